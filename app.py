@@ -1,197 +1,244 @@
 import streamlit as st
-import re
+import hashlib
 import os
-import json
-from datetime import datetime
-import fitz  # PyMuPDF
-import docx
+import time
 from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+from core import metrics
+from core.export import MIME_TYPES, available_formats, render_export
+from core.jobs import DONE, FAILED, FINISHED, get_queue
+from core.parser import extract_text
+from core.pipeline import PipelineError, analyze_revision, analyze_text, stream_llm
+from core.report import render_report
 
 st.set_page_config(layout="wide", page_title="Legal Analyzer")
 st.title("Legal Contract Risk Analyzer")
+metrics.serve()  # No-op unless METRICS_PORT is set
 
-def detect_language(text):
-    hindi_chars = sum(1 for c in text if '\u0900' <= c <= '\u097F')
-    return "hi" if hindi_chars > len(text) * 0.1 else "en"
+# Streamlit reruns this whole script on every widget interaction. Each stage is
+# memoized on the input's content hash (plus stage parameters); the underscore
+# arguments are excluded from Streamlit's own hashing. Caches are global and
+# bounded by max_entries/ttl; the session only keeps the digest it last analyzed.
+CACHE_ENTRIES = 32
+CACHE_TTL = 3600
 
-def read_pdf(file):
-    """Better PDF extraction"""
-    try:
-        file.seek(0)
-        doc = fitz.open(stream=file.read(), filetype="pdf")
-        full_text = ""
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            page_text = page.get_text()
-            full_text += page_text + "\n"
-        doc.close()
-        return re.sub(r'\s+', ' ', full_text.strip())
-    except:
-        return ""
+# With JOB_QUEUE_ENABLED=1 analyses run in `python -m core.jobs worker` processes;
+# this script only submits and polls, so a long upload never blocks the session
+JOB_QUEUE = os.getenv("JOB_QUEUE_ENABLED", "0").lower() not in ("0", "false", "no")
+JOB_PRIORITY = 10  # Interactive uploads go ahead of CLI-submitted batches (priority 0)
+JOB_POLL_SECONDS = 1.0
 
-def read_docx(file):
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def cached_extract(digest, name, _data):
+    metrics.inc("bytes_processed_total", len(_data), stage="upload")
     try:
-        file.seek(0)
-        doc = docx.Document(file)
-        full_text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
-        return re.sub(r'\s+', ' ', full_text.strip())
-    except:
+        return extract_text(name, BytesIO(_data))
+    except Exception:
         return ""
 
-def split_clauses(text):
-    """FIXED: Better clause extraction - full sentences around section headers"""
-    # Find section headers
-    section_patterns = [
-        r'(?:ARTICLE|Section|Clause)\s*\d+\.?\s*[^.!?]{10,300}',
-        r'(?:धारा|अनुच्छेद)\s*\d+\.?\s*[^.!?]{10,300}',
-        r'\d+\.\s*[^.!?]{20,400}'
-    ]
-    
-    clauses = []
-    for pattern in section_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-        for match in matches:
-            if len(match) > 50:
-                clauses.append(match.strip())
-    
-    # Fallback: meaningful sentences
-    if len(clauses) < 5:
-        sentences = re.split(r'(?<=[\.?!])\s+', text)
-        for sent in sentences:
-            if any(keyword in sent.lower() for keyword in ['shall', 'must', 'buyer', 'seller', 'transfer', 'assign', 'exclusive']):
-                if 60 < len(sent) < 800:
-                    clauses.append(sent.strip())
-    
-    # Remove duplicates and limit
-    unique_clauses = []
-    for clause in clauses[:15]:
-        if clause not in unique_clauses and len(clause) > 80:
-            unique_clauses.append(clause)
-    
-    return unique_clauses[:10]
+@st.cache_resource(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner="Analyzing contract...")
+def cached_analysis(digest, use_llm, _text):
+    with metrics.span("analysis", llm=str(use_llm).lower()):
+        return analyze_text(_text, use_llm=use_llm)
 
-def extract_entities(clause):
-    """FIXED: Better entity detection"""
-    text_lower = clause.lower()
-    
-    # IP/Legal terms (more specific)
-    ip_terms = re.findall(r'\b(?:intellectual property|IP rights?|ownership|assign|license|exclusive|non-compete|patent|copyright|trademark)\b', clause, re.I)
-    obligations = re.findall(r'\b(?:shall|must|obligation|required|liable|responsible)\b', clause, re.I)
-    
-    # Real money amounts only
-    money = re.findall(r'[\$₹€]\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?', clause)
-    
-    buyer_seller = 'buyer' in text_lower and 'seller' in text_lower
-    
-    return {
-        "ip_terms": ip_terms,
-        "obligations": obligations,
-        "money": money,
-        "buyer_seller": buyer_seller,
-        "ip_count": len(ip_terms),
-        "obligation_count": len(obligations)
-    }
+@st.cache_resource(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner="Comparing with the previous version...")
+def cached_revision(doc, digest, _text):
+    # Stores a new version as a side effect, so it must run once per (document, content)
+    with metrics.span("analysis", llm="false", revision="true"):
+        return analyze_revision(doc, _text)
 
-def calculate_risk(clause, entities):
-    """FIXED: Proper risk scoring"""
-    score = 0
-    
-    # IP Transfer Risk (highest)
-    if entities["ip_count"] >= 1 or any(word in clause.lower() for word in ['transfer', 'assign', 'convey']):
-        score += 35
-    
-    # Strong obligations
-    if entities["obligation_count"] >= 2:
-        score += 25
-    elif entities["obligation_count"] == 1:
-        score += 15
-    
-    # Buyer/Seller imbalance
-    if entities["buyer_seller"]:
-        score += 20
-    
-    # Termination/penalty clauses
-    if any(word in clause.lower() for word in ['terminate', 'indemnify', 'penalty']):
-        score += 15
-    
-    # Exclusive language
-    if 'exclusive' in clause.lower():
-        score += 10
-    
-    score = min(score, 100)
-    risk_level = "High" if score >= 60 else "Medium" if score >= 35 else "Low"
-    return risk_level, score
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner="Building report...")
+def cached_pdf_report(digest, use_llm, _results):
+    return render_report(_results)
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner="Preparing export...")
+def cached_export(digest, fmt, _results):
+    return render_export(_results, fmt)
+
+def render_export_button(slot, fmt, data, key):
+    slot.download_button(f"Download {fmt.upper()}", data, f"clauses.{fmt}", mime=MIME_TYPES[fmt], key=key,
+                         help="One row per clause: offsets, scores, entities and AI review fields")
+
+@st.cache_resource(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def cached_job_result(job_id):
+    return get_queue().result(job_id)
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_job_progress(job_id):
+    """Polls the queue on its own; a full rerun picks up the result once the job ends."""
+    job = get_queue().get(job_id)
+    if job is None or job["status"] in FINISHED:
+        st.rerun()
+    if job["status"] == "queued":
+        st.progress(0.0, text=f"Queued ({get_queue().counts().get('running', 0)} analyses running)")
+    else:
+        st.progress(job["progress"], text=f"{job['message'].capitalize()}...")
+    if not job["cancel_requested"] and st.button("Cancel analysis"):
+        get_queue().cancel(job_id)
+        st.rerun()
+
+def queued_analysis(key, name, data, doc, use_llm):
+    """Submit the input once per (content, options) and return (report, PDF) when done.
+
+    Until then the progress fragment is shown and the script run ends here.
+    """
+    jobs = st.session_state.setdefault("jobs", {})
+    job = get_queue().get(jobs[key]) if key in jobs else None
+    if job is None:
+        jobs[key] = get_queue().submit(name, data, use_llm=use_llm, audit=True,
+                                       doc=doc or None, priority=JOB_PRIORITY)
+        job = get_queue().get(jobs[key])
+    if job["status"] == DONE:
+        return cached_job_result(job["id"])
+    if job["status"] == FAILED:
+        st.warning(job["error"].split(": ", 1)[-1])
+        st.stop()
+    if job["status"] in FINISHED:
+        st.info("Analysis cancelled.")
+        if st.button("Start again"):
+            del jobs[key]
+            st.rerun()
+        st.stop()
+    render_job_progress(job["id"])
+    st.stop()
+
+def render_metrics_panel():
+    """Sidebar view of core.metrics: stage latencies and counters for this process."""
+    data = metrics.snapshot()
+    with st.sidebar.expander("Performance metrics", expanded=False):
+        stages = [h for h in data["histograms"] if h["name"] == "stage_seconds"]
+        if not stages and not data["counters"]:
+            st.caption("No samples yet.")
+        if stages:
+            rows = [f"| {', '.join(f'{k}={v}' for k, v in h['labels'].items())} | {h['count']} "
+                    f"| {h['mean']:.4f} | {h['sum']:.3f} |" for h in stages]
+            st.markdown("| stage | calls | mean s | total s |\n|---|---:|---:|---:|\n" + "\n".join(rows))
+        if data["counters"]:
+            rows = [f"| {c['name']} | {', '.join(f'{k}={v}' for k, v in c['labels'].items())} | {c['value']:g} |"
+                    for c in data["counters"]]
+            st.markdown("| counter | labels | value |\n|---|---|---:|\n" + "\n".join(rows))
+
+def render_llm_analysis(slot, analysis):
+    with slot.container():
+        st.markdown(f"""
+**AI review** — ownership: {analysis.get("ownership", "?")} · exclusivity: {analysis.get("exclusivity", "?")} · favor: {analysis.get("favor", "?")}  
+{analysis.get("risk_reason", "")}  
+*Fix:* {analysis.get("suggested_fix", "")}
+        """)
+
+REVISION_BADGES = {"modified": "✏️ Modified", "added": "🆕 New clause", "moved": "↕️ Moved"}
+
+def render_revision_badge(change):
+    """Revision status and risk delta for one clause card; unchanged clauses stay quiet."""
+    if change["status"] == "unchanged":
+        return
+    text = REVISION_BADGES[change["status"]]
+    if change["status"] != "added":
+        text += f" (was clause {change['previous_index'] + 1}"
+        if change["score_delta"]:
+            text += f", risk {change['previous_score']} → {change['previous_score'] + change['score_delta']}"
+        text += ")"
+    if change["score_delta"] and change["score_delta"] > 0:
+        st.error(text)
+    else:
+        st.info(text)
+
+def render_revision_summary(revision):
+    counts = revision["counts"]
+    if revision["previous_version"] is None:
+        st.caption(f"Saved as version {revision['version']} of “{revision['document']}”.")
+        return
+    st.markdown(
+        f"**Version {revision['version']} vs {revision['previous_version']}:** "
+        f"{counts.get('modified', 0)} modified · {counts.get('added', 0)} added · "
+        f"{counts.get('removed', 0)} removed · {counts.get('moved', 0)} moved · "
+        f"{counts.get('unchanged', 0)} unchanged (previous results reused)")
+    if revision["removed"]:
+        with st.expander(f"Removed clauses ({len(revision['removed'])})"):
+            for entry in revision["removed"]:
+                st.markdown(f"**Clause {entry['index'] + 1}** (risk {entry['score']}): {entry['clause'][:300]}")
 
 def get_input_text(mode):
+    """Return (text, content digest, (file name, bytes)) for the current input.
+
+    With the job queue, uploads are not extracted here (text is None): the worker does it.
+    """
     if mode == "Upload File":
         uploaded = st.file_uploader("Upload Contract", type=["pdf", "docx"], key="file_upload")
         if uploaded is not None:
             st.info(f"File: {uploaded.name} ({uploaded.size:,} bytes)")
             
-            uploaded.seek(0)
-            if uploaded.name.lower().endswith('.pdf'):
-                text = read_pdf(uploaded)
-            elif uploaded.name.lower().endswith('.docx'):
-                text = read_docx(uploaded)
-            else:
-                text = uploaded.read().decode("utf-8")
+            data = uploaded.getvalue()
+            if JOB_QUEUE:
+                return None, content_hash(data), (uploaded.name, data)
+            text = cached_extract(content_hash(data), uploaded.name, data)
             
             if text.strip():
                 st.success(f"Extracted {len(text):,} characters")
                 st.text_area("Extracted text preview:", text[:1000], height=100)
-                return text
+                return text, content_hash(text.encode("utf-8")), (uploaded.name, data)
             else:
                 st.error("Could not extract text from file")
-                return ""
-        return ""
-    return st.text_area("Paste contract text:", height=300)
-
-def create_pdf_report(results):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    
-    story = []
-    story.append(Paragraph("Legal Contract Risk Analysis Report", styles['Title']))
-    story.append(Spacer(1, 20))
-    
-    avg_score = sum(r["score"] for r in results) / len(results)
-    story.append(Paragraph(f"Overall Risk: {avg_score:.0f}/100", styles['Heading2']))
-    
-    for i, r in enumerate(results, 1):
-        story.append(Paragraph(f"Clause {i}: {r['risk']} ({r['score']}/100)", styles['Heading3']))
-        story.append(Paragraph(r['clause'][:400], styles['Normal']))
-        story.append(Spacer(1, 12))
-    
-    doc.build(story)
-    buffer.seek(0)
-    return buffer.getvalue()
+                return "", None, None
+        return "", None, None
+    text = st.text_area("Paste contract text:", height=300)
+    data = text.encode("utf-8")
+    return text, content_hash(data), ("pasted.txt", data)
 
 # MAIN UI
 st.markdown("---")
 mode = st.radio("Input:", ["Upload File", "Paste Text"])
-raw_text = get_input_text(mode)
+raw_text, digest, source = get_input_text(mode)
+has_input = digest is not None and (raw_text is None or bool(raw_text.strip()))
+use_llm = st.toggle("AI clause review (Groq)", value=False,
+                    help="Streams an LLM review into each clause card as soon as it arrives")
+doc_name = st.text_input("Track revisions as (optional)", placeholder="e.g. Acme NDA",
+                         help="Analyze each version under the same name: only changed clauses are "
+                              "re-scored and the cards show which risks changed").strip()
 
-if st.button("Analyze Contract", use_container_width=True) and raw_text.strip():
-    if len(raw_text) < 200:
-        st.warning("Need more text (200+ characters)")
-        st.stop()
-    
-    lang = detect_language(raw_text)
-    clauses = split_clauses(raw_text)
-    
-    if not clauses:
-        st.error("No clauses found. Try full contract sections.")
-        st.stop()
+if st.button("Analyze Contract", use_container_width=True) and has_input:
+    st.session_state["analyzed_digest"] = digest
+
+# Keep showing the last analysis across reruns (radio toggles, downloads) while the input is unchanged
+if has_input and st.session_state.get("analyzed_digest") == digest:
+    if JOB_QUEUE:
+        # The worker runs the LLM review too; its analyses are shown in the cards as they are
+        report, pdf_bytes = queued_analysis(f"{digest}|{doc_name}|{use_llm}", *source, doc_name, use_llm)
+    else:
+        try:
+            # Rule-based results only; the LLM review streams in below, card by card
+            report = cached_revision(doc_name, digest, raw_text) if doc_name else cached_analysis(digest, False, raw_text)
+        except PipelineError as e:
+            st.warning(str(e))
+            st.stop()
+        pdf_bytes = None
+    stream_reviews = use_llm and not JOB_QUEUE
     
-    st.success(f"Language: {'Hindi' if lang == 'hi' else 'English'} | Clauses: {len(clauses)}")
+    render_start = time.perf_counter()
+    lang = report["language"]
+    results = report["clauses"]
+    st.success(f"Language: {'Hindi' if lang == 'hi' else 'English'} | Clauses: {len(results)}")
+    revision = report.get("revision")
+    if revision:
+        render_revision_summary(revision)
+    # Revision results come from the stored versions, so they differ from a plain analysis of the same text
+    analysis_mode = f"revision|{doc_name}|{revision['version']}|{revision['previous_version']}" if revision else "plain"
+    if stream_reviews:
+        # Streamed reviews survive reruns; like the analysis, only the current input's are kept
+        review_key = f"{digest}|{analysis_mode}"
+        if st.session_state.get("llm_reviews", {}).get("key") != review_key:
+            st.session_state["llm_reviews"] = {"key": review_key, "analyses": {}}
+        reviews = st.session_state["llm_reviews"]["analyses"]
+    llm_status = st.empty()
+    llm_slots = []
     
-    results = []
-    for i, clause in enumerate(clauses, 1):
+    for i, r in enumerate(results, 1):
+        clause = r["clause"]
         st.markdown(f"**Clause {i}** ({len(clause)} chars)")
+        if revision:
+            render_revision_badge(revision["clauses"][i - 1])
         
         # Show FULL clause text
         with st.expander(f"View full clause text ({len(clause)} characters)"):
@@ -199,9 +246,7 @@ if st.button("Analyze Contract", use_container_width=True) and raw_text.strip():
         
         col1, col2 = st.columns([1, 4])
         with col1:
-            entities = extract_entities(clause)
-            risk_level, score = calculate_risk(clause, entities)
-            st.metric("Risk Score", f"{score}/100")
+            st.metric("Risk Score", f"{r['score']}/100")
         
         with col2:
             st.info(clause[:300] + "..." if len(clause) > 300 else clause)
@@ -209,51 +254,72 @@ if st.button("Analyze Contract", use_container_width=True) and raw_text.strip():
         # Analysis display
         st.markdown("---")
         st.markdown(f"""
-**Ownership:** {'Assigned' if entities["ip_count"] > 0 or 'transfer' in clause.lower() else 'Retained'}  
-**Exclusivity:** {'Exclusive' if 'exclusive' in clause.lower() else 'Shared'}  
-**Favor:** {'One-sided' if entities["buyer_seller"] else 'Balanced'}  
-**Risk score (0-100):** **{score}** ({risk_level})
+**Ownership:** {r["ownership"]}  
+**Exclusivity:** {r["exclusivity"]}  
+**Favor:** {r["favor"]}  
+**Risk score (0-100):** **{r["score"]}** ({r["risk"]})
         """)
         
-        # DETAILED risk explanation
-        explanation = []
-        if entities["ip_count"] > 0:
-            explanation.append(f"{entities['ip_count']} IP/legal terms: {', '.join(entities['ip_terms'][:2])}")
-        if entities["obligation_count"] > 0:
-            explanation.append(f"{entities['obligation_count']} obligation terms")
-        if entities["buyer_seller"]:
-            explanation.append("Buyer vs Seller - potential imbalance")
-        if entities["money"]:
-            explanation.append(f"Financial terms detected")
-        
-        risk_msg = "; ".join(explanation) if explanation else "Standard commercial terms"
-        
         st.markdown("**Why this is risky**")
-        st.warning(risk_msg)
-        
-        # Specific fixes
-        if score >= 60:
-            st.markdown("**Suggested Fix**")
-            st.success("Negotiate IP retention, liability caps, mutual termination rights")
-        elif score >= 35:
-            st.markdown("**Suggested Fix**")
-            st.success("Add time limits, clarify obligations, balance terms")
-        else:
-            st.markdown("**Suggested Fix**")
-            st.success("Terms appear reasonable")
+        st.warning(r["explanation"])
         
-        results.append({"clause": clause, "risk": risk_level, "score": score, "entities": entities})
+        st.markdown("**Suggested Fix**")
+        st.success(r["suggested_fix"])
+        if stream_reviews:
+            llm_slots.append(st.empty())
+            if i - 1 in reviews:
+                render_llm_analysis(llm_slots[-1], reviews[i - 1])
+            else:
+                llm_slots[-1].caption("Waiting for AI review...")
+        elif use_llm and "analysis" in r:
+            render_llm_analysis(st.empty(), r["analysis"])
         st.divider()
     
     # Summary
-    avg_score = sum(r["score"] for r in results) / len(results)
+    metrics.observe("stage_seconds", time.perf_counter() - render_start, stage="render")
+    summary = report["summary"]
     col1, col2, col3 = st.columns(3)
-    col1.metric("Composite Risk", f"{avg_score:.0f}/100")
-    col2.metric("Clauses", len(results))
-    col3.metric("High Risk", sum(1 for r in results if r["score"] >= 60))
+    previous = revision["previous_summary"] if revision else None
+    col1.metric("Composite Risk", f"{summary['composite_risk']:.0f}/100",
+                f"{summary['composite_risk'] - previous['composite_risk']:+.0f}" if previous else None,
+                delta_color="inverse")
+    col2.metric("Clauses", summary["clauses"])
+    col3.metric("High Risk", summary["high_risk"])
     
     # PDF Export
-    pdf_bytes = create_pdf_report(results)
-    st.download_button("Download PDF Report", pdf_bytes, "report.pdf")
+    if pdf_bytes is None:
+        pdf_bytes = cached_pdf_report(f"{digest}|{analysis_mode}", False, results)
+    col_pdf, col_format, col_data = st.columns(3)
+    col_pdf.download_button("Download PDF Report", pdf_bytes, "report.pdf")
+    # Machine-readable exports; refreshed with the AI review fields once streaming ends
+    export_format = col_format.selectbox("Data export format", available_formats(), label_visibility="collapsed")
+    export_slot = col_data.empty()
+    export_key = f"{digest}|{analysis_mode}|{use_llm and JOB_QUEUE}"
+    render_export_button(export_slot, export_format, cached_export(export_key, export_format, results), "export")
+
+    # Fill each card as its streamed result arrives; cached reviews land at once.
+    # Clauses reviewed on an earlier run of this script are not streamed again.
+    if stream_reviews:
+        missing = [i for i in range(len(results)) if i not in reviews]
+        reviewed = len(reviews)
+        one_sided = sum(str(a.get("favor", "")).lower() == "one-sided" for a in reviews.values())
+        llm_status.metric("AI reviewed", f"{reviewed}/{len(results)}", f"{one_sided} one-sided" if reviewed else None,
+                          delta_color="inverse")
+        for j, analysis in stream_llm([results[i] for i in missing], lang) if missing else ():
+            index = missing[j]
+            render_llm_analysis(llm_slots[index], analysis)
+            reviews[index] = analysis
+            reviewed += 1
+            one_sided += str(analysis.get("favor", "")).lower() == "one-sided"
+            llm_status.metric("AI reviewed", f"{reviewed}/{len(results)}", f"{one_sided} one-sided",
+                              delta_color="inverse")
+        reviewed_results = [dict(r, analysis=reviews[i]) if i in reviews else r for i, r in enumerate(results)]
+        # Every clause has its review here, so the key only has to tell reviewed from rule-only results
+        render_export_button(export_slot, export_format,
+                             cached_export(f"{export_key}|reviewed", export_format, reviewed_results),
+                             "export_reviewed")
+
+if metrics.enabled():
+    render_metrics_panel()
 
 st.markdown("For legal advice, consult qualified counsel.")
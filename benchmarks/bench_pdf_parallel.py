@@ -0,0 +1,84 @@
+"""Serial vs. parallel page-range PDF extraction, to place PARALLEL_MIN_PAGES.
+
+    python benchmarks/bench_pdf_parallel.py [--pages 8 16 32 64 128 256 512] [--workers N] [--json]
+
+Prints the median time of each mode per page count and the smallest page
+count from which parallel extraction is consistently faster (the crossover).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # noqa: E402
+
+from core.parser import iter_pdf_pages  # noqa: E402
+
+LINE = ("Section {n}. The Seller shall assign all intellectual property rights in the "
+        "deliverables to the Buyer and must indemnify the Buyer against any claim.")
+
+
+def make_pdf(path: str, pages: int, lines_per_page: int = 40):
+    doc = fitz.open()
+    n = 1
+    for _ in range(pages):
+        page = doc.new_page()
+        text = "\n".join(LINE.format(n=n + i) for i in range(lines_per_page))
+        n += lines_per_page
+        page.insert_textbox(fitz.Rect(36, 36, 560, 806), text, fontsize=6)
+    doc.save(path)
+    doc.close()
+
+
+def timed(path: str, workers: int, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _page in iter_pdf_pages(path, workers=workers, min_pages=1):
+            pass
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[8, 16, 32, 64, 128, 256, 512])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"doc-{pages}.pdf")
+            make_pdf(path, pages)
+            serial = timed(path, 1, args.repeats)
+            parallel = timed(path, args.workers, args.repeats) if args.workers > 1 else None
+            rows.append({"pages": pages, "serial_s": round(serial, 4),
+                         "parallel_s": round(parallel, 4) if parallel is not None else None})
+
+    # Crossover: first page count after which parallel never loses
+    crossover = None
+    for i, row in enumerate(rows):
+        if all(r["parallel_s"] is not None and r["parallel_s"] < r["serial_s"] for r in rows[i:]):
+            crossover = row["pages"]
+            break
+
+    if args.json:
+        print(json.dumps({"workers": args.workers, "rows": rows, "crossover_pages": crossover}, indent=2))
+        return
+    print(f"workers={args.workers}")
+    for r in rows:
+        par = f"{r['parallel_s']:.4f}s" if r["parallel_s"] is not None else "n/a"
+        print(f"{r['pages']:>6} pages  serial {r['serial_s']:.4f}s  parallel {par}")
+    print(f"crossover: {crossover if crossover is not None else 'none (parallel never wins)'}")
+
+
+if __name__ == "__main__":
+    main()
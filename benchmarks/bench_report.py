@@ -0,0 +1,86 @@
+"""PDF report time and peak memory vs. clause count, list story vs. streamed story.
+
+    python benchmarks/bench_report.py [--clauses 10 100 500 1000] [--detailed] [--json]
+
+"list" hands ReportLab every flowable up front (the old create_pdf_report /
+export_pdf approach); "stream" is core.report.write_report. Peak memory is the
+tracemalloc high-water mark of one build, written to a temp file.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import report  # noqa: E402
+
+CLAUSE = ("Section {n}. The Seller shall assign all intellectual property rights in the deliverables "
+          "to the Buyer on an exclusive basis and must indemnify the Buyer against any third-party claim. ")
+
+
+def make_results(count: int) -> list[dict]:
+    return [{
+        "clause": CLAUSE.format(n=i) * 3,
+        "risk": "High" if i % 3 == 0 else "Medium",
+        "score": 40 + i % 50,
+        "analysis": {"risk_reason": "Full transfer with no retained rights.",
+                     "suggested_fix": "Retain background IP and add a license-back."},
+    } for i in range(count)]
+
+
+def build_list(results, path, detailed):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate
+
+    flowables = report.detailed_flowables if detailed else report.summary_flowables
+    SimpleDocTemplate(path, pagesize=A4).build(list(flowables(results)))
+
+
+def build_stream(results, path, detailed):
+    report.write_report(results, path, detailed=detailed)
+
+
+def measure(build, results, path, detailed) -> tuple[float, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    build(results, path, detailed)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clauses", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--detailed", action="store_true", help="export_pdf layout (full clause + table)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    report.write_report(make_results(1), os.devnull)  # Warm fonts/styles outside the measurements
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "report.pdf")
+        for count in args.clauses:
+            results = make_results(count)
+            row = {"clauses": count}
+            for mode, build in (("list", build_list), ("stream", build_stream)):
+                elapsed, peak = measure(build, results, path, args.detailed)
+                row[f"{mode}_s"] = round(elapsed, 4)
+                row[f"{mode}_peak_mb"] = round(peak, 2)
+            rows.append(row)
+
+    if args.json:
+        print(json.dumps({"detailed": args.detailed, "rows": rows}, indent=2))
+        return
+    for r in rows:
+        print(f"{r['clauses']:>6} clauses  list {r['list_s']:.3f}s {r['list_peak_mb']:.1f} MB"
+              f"  stream {r['stream_s']:.3f}s {r['stream_peak_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
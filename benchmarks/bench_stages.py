@@ -0,0 +1,164 @@
+"""Per-stage time and peak memory over the synthetic corpus, with JSON baselines.
+
+    python benchmarks/bench_stages.py [--sizes 1K 100K 1M] [--langs en hi] [--repeats 3]
+                                      [--save benchmarks/baselines/stages.json]
+                                      [--compare benchmarks/baselines/stages.json] [--tolerance 1.5]
+
+Stages: read_pdf / read_docx / read_txt on each corpus file, then on the text
+split_clauses, extract_entities, calculate_risk, log_audit (into a temp dir)
+and both report builders. Time is the median of --repeats plain runs; peak
+memory is the tracemalloc high-water mark of one extra run. With --compare,
+exits with status 1 when any stage is slower than baseline × tolerance.
+Corpus files are generated once into --corpus and reused.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("AUDIT_DIR", tempfile.mkdtemp(prefix="bench-audit-"))
+
+from benchmarks.corpus import CORPUS_VERSION, build_corpus, corpus_name, format_size, parse_size  # noqa: E402
+from core.audit import log_audit  # noqa: E402
+from core.clause_splitter import split_clauses  # noqa: E402
+from core.parser import preprocess_batch, read_docx, read_pdf, read_txt  # noqa: E402
+from core.report import render_report  # noqa: E402
+from core.scoring import calculate_risk, extract_entities  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(ROOT, "benchmarks", "corpus_data")
+READERS = {"pdf": read_pdf, "docx": read_docx, "txt": read_txt}
+REPORT_CLAUSES = 500  # Report builders are measured on at most this many clauses
+
+
+def measure(fn, repeats: int) -> dict:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": round(statistics.median(samples), 5), "peak_mb": round(peak / 2**20, 3)}
+
+
+def read_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return READERS[path.rsplit(".", 1)[1]](f)
+
+
+def bench_document(base: str, lang: str, repeats: int) -> dict:
+    """All stages for one corpus document (`base` is the path without extension)."""
+    stages = {}
+    for ext, reader in READERS.items():
+        path = f"{base}.{ext}"
+        stages[f"read_{ext}"] = measure(lambda: read_file(path), repeats)
+
+    text = read_file(f"{base}.txt")
+    clauses = split_clauses(text, lang)
+    entities = [extract_entities(c) for c in clauses]
+    results = []
+    for clause, ents in zip(clauses, entities):
+        risk, score = calculate_risk(clause, ents)
+        results.append({"clause": clause, "risk": risk, "score": score, "entities": ents})
+    report_results = results[:REPORT_CLAUSES]
+
+    stages["split_clauses"] = measure(lambda: split_clauses(text, lang), repeats)
+    stages["preprocess"] = measure(lambda: preprocess_batch(clauses, lang), repeats)
+    stages["extract_entities"] = measure(lambda: [extract_entities(c) for c in clauses], repeats)
+    stages["calculate_risk"] = measure(
+        lambda: [calculate_risk(c, e) for c, e in zip(clauses, entities)], repeats)
+    stages["log_audit"] = measure(lambda: log_audit(results, lang), repeats)
+    stages["report_summary"] = measure(lambda: render_report(report_results), repeats)
+    stages["report_detailed"] = measure(lambda: render_report(report_results, detailed=True), repeats)
+    return {"chars": len(text), "clauses": len(clauses), "stages": stages}
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Stages slower than baseline × tolerance, as printable lines."""
+    regressions = []
+    for doc, entry in current["documents"].items():
+        base_stages = baseline.get("documents", {}).get(doc, {}).get("stages", {})
+        for stage, result in entry["stages"].items():
+            base = base_stages.get(stage)
+            if not base or not base["seconds"]:
+                continue
+            ratio = result["seconds"] / base["seconds"]
+            line = f"{doc:<24} {stage:<18} {base['seconds']:.4f}s -> {result['seconds']:.4f}s  x{ratio:.2f}"
+            print(line)
+            if ratio > tolerance:
+                regressions.append(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=["1K", "100K", "1M"])
+    parser.add_argument("--langs", nargs="+", default=["en", "hi"])
+    parser.add_argument("--styles", nargs="+", default=["numbered", "freeform"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--save", help="write results JSON here (e.g. a new baseline)")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    args = parser.parse_args(argv)
+
+    build_corpus(args.corpus, args.sizes, args.langs, args.styles, seed=args.seed)
+    documents = {}
+    for size in args.sizes:
+        for lang in args.langs:
+            for style in args.styles:
+                name = f"{lang}-{style}-{format_size(parse_size(size))}"
+                base = os.path.join(args.corpus, corpus_name(lang, style, parse_size(size), args.seed))
+                documents[name] = entry = bench_document(base, lang, args.repeats)
+                for stage, r in entry["stages"].items():
+                    print(f"{name:<24} {stage:<18} {r['seconds']:>9.4f}s {r['peak_mb']:>9.2f} MB")
+
+    current = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "corpus_version": CORPUS_VERSION,
+        "repeats": args.repeats,
+        "documents": documents,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\ncompared with {baseline.get('commit')} (tolerance x{args.tolerance}):")
+        corpus = (baseline.get("seed"), baseline.get("corpus_version"))
+        if corpus != (args.seed, CORPUS_VERSION):
+            print(f"warning: baseline corpus is seed {corpus[0]} version {corpus[1]}, "
+                  f"this run used seed {args.seed} version {CORPUS_VERSION}; timings are not comparable")
+        regressions = compare(current, baseline, args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:\n" + "\n".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Cold-start benchmark: fresh-process import time and time to first render.
+
+    python benchmarks/bench_startup.py [--runs 5] [--budget benchmarks/startup_budget.json] [--json]
+
+Every measurement starts a new interpreter so nothing is warm in sys.modules.
+Exits with status 1 when a median exceeds its budget, so CI can gate on it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(ROOT, "benchmarks", "startup_budget.json")
+
+# Each snippet runs in a fresh process and prints its own elapsed seconds
+CHECKS = {
+    "import_core_pipeline_s": (
+        "import time; t = time.perf_counter(); import core.pipeline; "
+        "print(time.perf_counter() - t)"
+    ),
+    "import_app_deps_s": (
+        "import time; t = time.perf_counter(); import streamlit, core.pipeline, core.parser; "
+        "print(time.perf_counter() - t)"
+    ),
+    "first_render_s": (
+        "import time; t = time.perf_counter(); "
+        "from streamlit.testing.v1 import AppTest; "
+        "at = AppTest.from_file('app.py', default_timeout=120).run(); "
+        "assert not at.exception, at.exception; "
+        "print(time.perf_counter() - t)"
+    ),
+}
+
+# Modules that must stay unloaded after importing the pipeline for a pasted-text session
+MUST_BE_LAZY = ("spacy", "fitz", "docx", "reportlab", "groq")
+
+
+def measure(snippet: str) -> float:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+    lines = out.stdout.strip().splitlines()
+    # Report interpreter startup too for the render check: that is what a cold container pays
+    return wall if "AppTest" in snippet else float(lines[-1])
+
+
+def eager_modules() -> list[str]:
+    snippet = f"import sys, core.pipeline; print(','.join(m for m in {MUST_BE_LAZY!r} if m in sys.modules))"
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold-start import/render benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", default=DEFAULT_BUDGET)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    with open(args.budget, "r", encoding="utf-8") as f:
+        budget = json.load(f)
+
+    results = {}
+    for name, snippet in CHECKS.items():
+        samples = [measure(snippet) for _ in range(args.runs)]
+        results[name] = {"median": round(statistics.median(samples), 4),
+                         "min": round(min(samples), 4), "budget": budget.get(name)}
+    results["eager_heavy_modules"] = eager_modules()
+
+    failures = [n for n, r in results.items()
+                if isinstance(r, dict) and r["budget"] is not None and r["median"] > r["budget"]]
+    if results["eager_heavy_modules"]:
+        failures.append("eager_heavy_modules")
+
+    if args.json:
+        print(json.dumps({"results": results, "failures": failures}, indent=2))
+    else:
+        for name, r in results.items():
+            if isinstance(r, dict):
+                flag = "FAIL" if name in failures else "ok"
+                print(f"{name:<26} median {r['median']:.3f}s  min {r['min']:.3f}s  budget {r['budget']}s  {flag}")
+        print(f"eager heavy modules: {', '.join(results['eager_heavy_modules']) or 'none'}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
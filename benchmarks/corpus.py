@@ -0,0 +1,177 @@
+"""Reproducible synthetic English/Hindi contracts for the benchmarks.
+
+    python benchmarks/corpus.py OUT_DIR [--sizes 1K 100K 1M 10M] [--langs en hi]
+                                [--styles numbered freeform] [--formats txt docx pdf] [--seed 0]
+
+Files are named `{lang}-{style}-{size}-s{seed}-v{CORPUS_VERSION}.{ext}`; the
+same seed and generator version always produce the same text, and existing
+files are only reused when both match. "numbered" contracts use Section/धारा headers and bare "N.M"
+subsection numbers, "freeform" ones are plain paragraphs that exercise the
+splitter's keyword fallback. Amounts with decimals ("1,000.00") and terms like
+"3.5 years" check that numbers inside a sentence are never taken for headers.
+Sizes are UTF-8 bytes of the text (the DOCX/PDF container adds its own overhead).
+"""
+import argparse
+import html
+import os
+import random
+
+PARTIES = {
+    "en": [("Seller", "Buyer"), ("Licensor", "Licensee"), ("Contractor", "Client"), ("Vendor", "Company")],
+    "hi": [("विक्रेता", "क्रेता"), ("लाइसेंसदाता", "लाइसेंसधारी"), ("ठेकेदार", "ग्राहक")],
+}
+CLAUSES = {
+    "en": [
+        "The {a} shall assign all intellectual property rights, including every patent, copyright and trademark in the deliverables, to the {b} on an exclusive basis.",
+        "The {b} must pay the {a} ${amount} within thirty days of the invoice dated {date}.",
+        "The {a} grants the {b} a non-exclusive license to use the software for internal purposes only.",
+        "Either party may terminate this agreement on {date} by giving sixty days written notice to the other party.",
+        "The {a} shall indemnify the {b} against any claim, penalty or loss arising from a breach of this clause.",
+        "The {b} is prohibited from disclosing confidential information and cannot transfer its obligations without consent.",
+        "Ownership of all background technology remains with the {a}, who is entitled to use it in other projects.",
+        "The {a} is responsible for obtaining every permit required for performance and is liable for any delay.",
+        "This agreement shall remain in force for {years} years from {date}, and the {b} shall pay USD {amount} upon signing.",
+    ],
+    "hi": [
+        "{a} सभी बौद्धिक संपदा अधिकार, जिसमें पेटेंट, कॉपीराइट और ट्रेडमार्क शामिल हैं, विशेष रूप से {b} को हस्तांतरित करेगा।",
+        "{b} चालान दिनांक {date} के तीस दिनों के भीतर {a} को ₹{amount} का भुगतान करेगा।",
+        "{a} {b} को केवल आंतरिक उपयोग के लिए सॉफ़्टवेयर का गैर-विशेष लाइसेंस देता है।",
+        "कोई भी पक्ष साठ दिनों की लिखित सूचना देकर {date} को यह अनुबंध समाप्त कर सकता है।",
+        "{a} इस खंड के उल्लंघन से उत्पन्न किसी भी दावे, दंड या हानि के विरुद्ध {b} की क्षतिपूर्ति करेगा।",
+        "{b} गोपनीय जानकारी का खुलासा नहीं करेगा और सहमति के बिना अपने दायित्वों का हस्तांतरण नहीं कर सकता।",
+        "सभी पृष्ठभूमि प्रौद्योगिकी का स्वामित्व {a} के पास रहेगा, जिसे अन्य परियोजनाओं में इसका उपयोग करने का अधिकार होगा।",
+        "{a} सभी आवश्यक अनुमतियाँ प्राप्त करने के लिए जिम्मेदार होगा और किसी भी देरी के लिए उत्तरदायी होगा।",
+        "यह अनुबंध {date} से {years} वर्षों तक लागू रहेगा और {b} हस्ताक्षर पर ₹{amount} का भुगतान करेगा।",
+    ],
+}
+HEADERS = {"en": ("Section {n}.", "Section {n}.{m}", "{n}.{m}"), "hi": ("धारा {n}.", "धारा {n}.{m}", "{n}.{m}")}
+PREAMBLE = {
+    "en": "This Agreement is made between the parties named below and sets out the terms on which the work is performed.",
+    "hi": "यह अनुबंध नीचे नामित पक्षों के बीच किया गया है और उन शर्तों को निर्धारित करता है जिन पर कार्य किया जाएगा।",
+}
+SIZE_UNITS = {"K": 1024, "M": 1024 ** 2}
+CORPUS_VERSION = 2  # Bump whenever the generated text changes, so stale files are not reused
+
+
+def parse_size(text: str) -> int:
+    """"100K" -> 102400, "10M" -> 10485760, "512" -> 512."""
+    unit = text[-1].upper()
+    return int(float(text[:-1]) * SIZE_UNITS[unit]) if unit in SIZE_UNITS else int(text)
+
+
+def format_size(size: int) -> str:
+    for unit, factor in sorted(SIZE_UNITS.items(), key=lambda kv: -kv[1]):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return str(size)
+
+
+def corpus_name(lang: str, style: str, size: int, seed: int = 0) -> str:
+    """File name (without extension) of one generated document."""
+    return f"{lang}-{style}-{format_size(size)}-s{seed}-v{CORPUS_VERSION}"
+
+
+def _sentence(rng: random.Random, lang: str) -> str:
+    a, b = rng.choice(PARTIES[lang])
+    return rng.choice(CLAUSES[lang]).format(
+        a=a, b=b, amount=f"{rng.randint(1, 999):,},{rng.randint(0, 999):03d}.{rng.randint(0, 99):02d}",
+        years=f"{rng.randint(1, 9)}.{rng.choice((0, 5))}",
+        date=f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2020, 2030)}",
+    )
+
+
+def iter_paragraphs(lang: str = "en", style: str = "numbered", seed: int = 0):
+    """Endless stream of contract paragraphs (one clause each)."""
+    rng = random.Random(f"{lang}-{style}-{seed}")
+    yield PREAMBLE[lang]
+    n = 1
+    while True:
+        body = " ".join(_sentence(rng, lang) for _ in range(rng.randint(1, 4)))
+        header = rng.choice(HEADERS[lang]).format(n=n, m=rng.randint(1, 9))
+        yield f"{header} {body}" if style == "numbered" else body
+        n += 1
+
+
+def generate_paragraphs(size: int, lang: str = "en", style: str = "numbered", seed: int = 0) -> list[str]:
+    """Paragraphs totalling roughly `size` UTF-8 bytes (at least one paragraph)."""
+    paragraphs, total = [], 0
+    for paragraph in iter_paragraphs(lang, style, seed):
+        paragraphs.append(paragraph)
+        total += len(paragraph.encode("utf-8")) + 1
+        if total >= size:
+            return paragraphs
+
+
+def generate_text(size: int, lang: str = "en", style: str = "numbered", seed: int = 0) -> str:
+    return "\n".join(generate_paragraphs(size, lang, style, seed))
+
+
+def write_txt(paragraphs: list[str], path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(paragraphs))
+
+
+def write_docx(paragraphs: list[str], path: str):
+    import docx
+
+    document = docx.Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    document.save(path)
+
+
+def write_pdf(paragraphs: list[str], path: str):
+    """Lay the text out with a MuPDF Story, whose fallback fonts cover Devanagari."""
+    import fitz
+
+    story = fitz.Story("".join(f"<p>{html.escape(p)}</p>" for p in paragraphs))
+    writer = fitz.DocumentWriter(path)
+    mediabox = fitz.paper_rect("a4")
+    where = mediabox + (36, 36, -36, -36)
+    more = True
+    while more:
+        device = writer.begin_page(mediabox)
+        more, _ = story.place(where)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+
+def build_corpus(out_dir: str, sizes=("1K", "100K", "1M"), langs=("en", "hi"),
+                 styles=("numbered", "freeform"), formats=("txt", "docx", "pdf"), seed: int = 0) -> list[str]:
+    """Write every combination to `out_dir`; existing files are kept. Returns the paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for size in sizes:
+        size = parse_size(size) if isinstance(size, str) else size
+        for lang in langs:
+            for style in styles:
+                paragraphs = None
+                for fmt in formats:
+                    path = os.path.join(out_dir, f"{corpus_name(lang, style, size, seed)}.{fmt}")
+                    if not os.path.exists(path):
+                        paragraphs = paragraphs or generate_paragraphs(size, lang, style, seed)
+                        WRITERS[fmt](paragraphs, path)
+                    paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    parser.add_argument("--sizes", nargs="+", default=["1K", "100K", "1M", "10M"])
+    parser.add_argument("--langs", nargs="+", choices=sorted(PARTIES), default=["en", "hi"])
+    parser.add_argument("--styles", nargs="+", choices=["numbered", "freeform"], default=["numbered", "freeform"])
+    parser.add_argument("--formats", nargs="+", choices=sorted(WRITERS), default=sorted(WRITERS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for path in build_corpus(args.out_dir, args.sizes, args.langs, args.styles, args.formats, args.seed):
+        print(f"{os.path.getsize(path):>12,}  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,196 @@
+import atexit
 import json
 import os
+import re
+import threading
+import time
 from datetime import datetime
 
-AUDIT_FILE = "data/audit_logs.json"
+from core import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+AUDIT_FILE = "data/audit_logs.json"  # Legacy whole-file JSON array
+AUDIT_DIR = os.getenv("AUDIT_DIR", "data/audit")
+SEGMENT_MAX_BYTES = int(os.getenv("AUDIT_SEGMENT_MAX_BYTES", str(8 * 1024 * 1024)))
+FSYNC_EVERY = int(os.getenv("AUDIT_FSYNC_EVERY", "16"))  # entries per grouped fsync
+FSYNC_INTERVAL = float(os.getenv("AUDIT_FSYNC_INTERVAL", "1.0"))  # max seconds between fsyncs
+
+_SEGMENT_RE = re.compile(r"^audit-(\d{6})\.jsonl$")
+
+
+def segment_name(number: int) -> str:
+    return f"audit-{number:06d}.jsonl"
+
+
+def segment_number(path: str) -> int:
+    return int(_SEGMENT_RE.match(os.path.basename(path)).group(1))
+
+
+class AuditLog:
+    """Append-only audit log split into size-rotated JSONL segments.
+
+    Appends take an exclusive file lock so several Streamlit processes can share
+    one directory, and fsync is grouped every `fsync_every` entries or
+    `fsync_interval` seconds instead of once per entry.
+    """
+
+    def __init__(self, directory: str = AUDIT_DIR, segment_max_bytes: int = SEGMENT_MAX_BYTES,
+                 fsync_every: int = FSYNC_EVERY, fsync_interval: float = FSYNC_INTERVAL):
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        os.makedirs(directory, exist_ok=True)
+        self._thread_lock = threading.Lock()
+        self._lock_fd = os.open(os.path.join(directory, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        self._fd = None
+        self._segment = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def segments(self) -> list[str]:
+        """Segment paths, oldest first."""
+        numbers = sorted(int(m.group(1)) for m in map(_SEGMENT_RE.match, os.listdir(self.directory)) if m)
+        return [os.path.join(self.directory, segment_name(n)) for n in numbers]
+
+    def _path(self, number: int) -> str:
+        return os.path.join(self.directory, segment_name(number))
+
+    def _open(self, number: int):
+        if self._fd is not None:
+            self._sync()
+            os.close(self._fd)
+        self._segment = number
+        self._fd = os.open(self._path(number), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _current_segment(self):
+        """Point at the newest segment, following rotations done by other processes."""
+        if self._fd is None:
+            existing = self.segments()
+            last = segment_number(existing[-1]) if existing else 1
+            self._open(last)
+        while os.path.exists(self._path(self._segment + 1)):
+            self._open(self._segment + 1)
+
+    def _sync(self):
+        if self._fd is not None and self._unsynced:
+            with metrics.span("audit_fsync"):
+                os.fsync(self._fd)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def append_many(self, entries: list[dict]):
+        data = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries).encode("utf-8")
+        if not data:
+            return
+        with self._thread_lock:
+            if fcntl:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                self._current_segment()
+                size = os.fstat(self._fd).st_size
+                if size and size + len(data) > self.segment_max_bytes:
+                    self._open(self._segment + 1)
+                os.write(self._fd, data)
+                metrics.inc("bytes_processed_total", len(data), stage="audit")
+                metrics.inc("audit_entries_total", len(entries))
+                self._unsynced += len(entries)
+                if (self._unsynced >= self.fsync_every
+                        or time.monotonic() - self._last_sync >= self.fsync_interval):
+                    self._sync()
+            finally:
+                if fcntl:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def append(self, entry: dict):
+        self.append_many([entry])
+
+    def flush(self):
+        """Force pending appends to disk."""
+        with self._thread_lock:
+            self._sync()
+
+    def close(self):
+        with self._thread_lock:
+            self._sync()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def iter_entries(self):
+        """Yield every entry in append order, skipping torn or corrupt lines."""
+        for path in self.segments():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except (json.JSONDecodeError, ValueError):
+                        continue
+
+
+def migrate_legacy_audit(log: "AuditLog", json_path: str = AUDIT_FILE) -> int:
+    """One-time import of the old JSON array file, which is left behind as *.migrated."""
+    migrated_path = json_path + ".migrated"
+    try:
+        # Renaming first claims the file, so concurrent processes import it only once
+        os.replace(json_path, migrated_path)
+    except FileNotFoundError:
+        return 0
+    data = []
+    try:
+        with open(migrated_path, "r", encoding="utf-8") as f:
+            content = f.read().strip()
+            if content:
+                data = json.loads(content)
+    except (json.JSONDecodeError, ValueError):
+        data = []  # Corrupted file → nothing to keep
+    entries = [e for e in data if isinstance(e, dict)] if isinstance(data, list) else []
+    if entries:
+        log.append_many(entries)
+        log.flush()
+    return len(entries)
+
+
+# Lazy shared instance; migrates the legacy file on first use
+_log = None
+_log_lock = threading.Lock()
+def get_audit_log() -> AuditLog:
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = AuditLog()
+            migrate_legacy_audit(_log)
+            atexit.register(_log.close)
+    return _log
+
 
 def log_audit(results: list, language: str = "unknown"):
     """Log analysis results safely."""
-    os.makedirs("data", exist_ok=True)
-    
     audit_entry = {
         "timestamp": datetime.utcnow().isoformat(),
         "language": language,
         "total_clauses": len(results),
-        "avg_risk": sum(r.get("score", 0) for r in results) / len(results),
+        "avg_risk": sum(r.get("score", 0) for r in results) / len(results) if results else 0,
         "clauses": [{"risk": r.get("risk", "N/A"), "score": r.get("score", 0)} for r in results]
     }
-    
-    # SAFE JSON loading with empty file handling
-    data = []
-    if os.path.exists(AUDIT_FILE):
-        try:
-            with open(AUDIT_FILE, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                if content:  # Only load if not empty
-                    data = json.loads(content)
-                else:
-                    data = []
-        except (json.JSONDecodeError, ValueError):
-            data = []  # Corrupted file → start fresh
-    
-    # Append new entry
-    data.append(audit_entry)
-    
-    # FIXED: json.dump(data, f, indent=2, ensure_ascii=False)
-    with open(AUDIT_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    with metrics.span("audit"):
+        get_audit_log().append(audit_entry)
+
+
+def iter_audit_entries():
+    return get_audit_log().iter_entries()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["migrate"]:
+        log = AuditLog()
+        print(f"Migrated {migrate_legacy_audit(log)} entries into {log.directory}")
+        log.close()
+    else:
+        print("usage: python -m core.audit migrate")
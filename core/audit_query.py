@@ -0,0 +1,177 @@
+"""Incremental rollups and queries over the audit log.
+
+Rollups are kept in `rollups.json` next to the audit segments together with a
+(segment, byte offset) checkpoint, so each refresh reads only entries appended
+since the previous one. Usable as a CLI:
+
+    python -m core.audit_query avg-risk --from 2024-01-01
+    python -m core.audit_query high-risk --by language
+    python -m core.audit_query histogram --language hi --json
+"""
+import argparse
+import json
+import os
+import threading
+
+from core.audit import AuditLog, get_audit_log, segment_number
+from core.risk_model import get_model
+
+BIN_WIDTH = 10
+NUM_BINS = 100 // BIN_WIDTH + 1  # last bin holds score 100
+ROLLUP_VERSION = 2  # 2: high-risk counts follow each clause's logged risk level
+
+
+def _empty_state() -> dict:
+    return {"version": ROLLUP_VERSION, "checkpoint": [0, 0], "days": {}, "histogram": {}}
+
+
+class AuditRollup:
+    """Per-day, per-language aggregates maintained by tailing the audit segments."""
+
+    def __init__(self, log: AuditLog | None = None):
+        self.log = log or get_audit_log()
+        self.path = os.path.join(self.log.directory, "rollups.json")
+        self._lock = threading.Lock()
+        self.state = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") == ROLLUP_VERSION:
+                return state
+        except (OSError, json.JSONDecodeError, ValueError):
+            pass
+        return _empty_state()
+
+    def _save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def _add(self, entry: dict, high_level: str):
+        day = str(entry.get("timestamp", ""))[:10] or "unknown"
+        lang = entry.get("language", "unknown")
+        bucket = self.state["days"].setdefault(day, {}).setdefault(
+            lang, {"entries": 0, "clauses": 0, "score_sum": 0, "high": 0})
+        hist = self.state["histogram"].setdefault(lang, [0] * NUM_BINS)
+        bucket["entries"] += 1
+        for clause in entry.get("clauses", []):
+            score = clause.get("score", 0)
+            bucket["clauses"] += 1
+            bucket["score_sum"] += score
+            if clause.get("risk") == high_level:
+                bucket["high"] += 1
+            hist[min(max(int(score), 0), 100) // BIN_WIDTH] += 1
+
+    def refresh(self) -> int:
+        """Fold in entries appended since the last checkpoint; returns how many."""
+        with self._lock:
+            self.log.flush()
+            segment, offset = self.state["checkpoint"]
+            high_level = get_model().high_level
+            added = 0
+            for path in self.log.segments():
+                number = segment_number(path)
+                if number < segment:
+                    continue
+                if number > segment:
+                    segment, offset = number, 0
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    for line in f:
+                        if not line.endswith(b"\n"):
+                            break  # Partial write in progress; pick it up next time
+                        offset += len(line)
+                        try:
+                            self._add(json.loads(line), high_level)
+                            added += 1
+                        except (json.JSONDecodeError, ValueError):
+                            continue
+            self.state["checkpoint"] = [segment, offset]
+            if added:
+                self._save()
+            return added
+
+    def _buckets(self, start: str | None, end: str | None, language: str | None):
+        for day in sorted(self.state["days"]):
+            if (start and day < start) or (end and day > end):
+                continue
+            for lang, bucket in sorted(self.state["days"][day].items()):
+                if language is None or lang == language:
+                    yield day, lang, bucket
+
+    def avg_risk_by_language_day(self, start: str | None = None, end: str | None = None,
+                                 language: str | None = None) -> list[dict]:
+        """Clause-weighted average risk score for each (day, language)."""
+        self.refresh()
+        return [{"day": day, "language": lang, "entries": b["entries"], "clauses": b["clauses"],
+                 "avg_risk": round(b["score_sum"] / b["clauses"], 2) if b["clauses"] else 0.0}
+                for day, lang, b in self._buckets(start, end, language)]
+
+    def high_risk_counts(self, by: str = "day", start: str | None = None, end: str | None = None,
+                         language: str | None = None) -> dict:
+        """Number of clauses rated High risk when logged, grouped by day or language."""
+        self.refresh()
+        counts = {}
+        for day, lang, b in self._buckets(start, end, language):
+            key = day if by == "day" else lang
+            counts[key] = counts.get(key, 0) + b["high"]
+        return counts
+
+    def score_histogram(self, language: str | None = None) -> dict:
+        """Clause score counts in BIN_WIDTH-wide bins, keyed by bin label."""
+        self.refresh()
+        totals = [0] * NUM_BINS
+        for lang, hist in self.state["histogram"].items():
+            if language is None or lang == language:
+                totals = [a + b for a, b in zip(totals, hist)]
+        labels = [f"{i * BIN_WIDTH}-{min(i * BIN_WIDTH + BIN_WIDTH - 1, 100)}" for i in range(NUM_BINS - 1)]
+        return dict(zip(labels + ["100"], totals))
+
+    def rebuild(self):
+        """Drop the rollups and recompute them from every segment."""
+        with self._lock:
+            self.state = _empty_state()
+        self.refresh()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.audit_query", description="Query audit rollups.")
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    # Also accepted after the subcommand; SUPPRESS keeps a leading --json from being reset
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", default=argparse.SUPPRESS, help="print raw JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("avg-risk", "high-risk"):
+        p = sub.add_parser(name, parents=[common])
+        p.add_argument("--from", dest="start")
+        p.add_argument("--to", dest="end")
+        p.add_argument("--language")
+    sub.choices["high-risk"].add_argument("--by", choices=["day", "language"], default="day")
+    sub.add_parser("histogram", parents=[common]).add_argument("--language")
+    sub.add_parser("rebuild", parents=[common])
+    args = parser.parse_args(argv)
+
+    rollup = AuditRollup()
+    if args.command == "avg-risk":
+        result = rollup.avg_risk_by_language_day(args.start, args.end, args.language)
+        rows = [f"{r['day']}  {r['language']:<8} {r['avg_risk']:>6.2f}  ({r['clauses']} clauses)" for r in result]
+    elif args.command == "high-risk":
+        result = rollup.high_risk_counts(args.by, args.start, args.end, args.language)
+        rows = [f"{k:<12} {v}" for k, v in result.items()]
+    elif args.command == "histogram":
+        result = rollup.score_histogram(args.language)
+        peak = max(result.values()) or 1
+        rows = [f"{k:>7} {v:>8} {'#' * round(40 * v / peak)}" for k, v in result.items()]
+    else:
+        rollup.rebuild()
+        result = {"checkpoint": rollup.state["checkpoint"]}
+        rows = [f"Rebuilt rollups up to segment {result['checkpoint'][0]}"]
+
+    print(json.dumps(result, indent=2, ensure_ascii=False) if args.json else "\n".join(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Bulk-screen a directory of contracts across a process pool.
+
+    python -m core.batch contracts/ -o results.jsonl --workers 8 [--llm] [--resume]
+                         [--format files|jsonl|csv|parquet]
+
+By default writes one JSON object per file, in completion order:
+{"file": ..., "language": ..., "summary": {...}, "clauses": [...]} or
+{"file": ..., "error": ...} when a file cannot be analyzed.
+
+The jsonl, csv and parquet formats instead write one flat row per clause
+(see core.export), streamed as each file finishes; files that cannot be
+analyzed are reported on stderr.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from core.export import EXPORTERS, available_formats, open_exporter
+from core.parser import SUPPORTED_EXTENSIONS
+from core.pipeline import analyze_file
+
+
+def find_contracts(root: str, recursive: bool = True) -> list[str]:
+    """Supported files under `root`, sorted for reproducible runs."""
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        paths.extend(os.path.join(dirpath, f) for f in filenames if f.lower().endswith(SUPPORTED_EXTENSIONS))
+        if not recursive:
+            break
+    return sorted(paths)
+
+
+def _already_done(output: str, fmt: str = "files") -> set[str]:
+    done = set()
+    if os.path.exists(output):
+        with open(output, "r", encoding="utf-8", newline="") as f:
+            if fmt == "csv":
+                return {row["file"] for row in csv.DictReader(f) if row.get("file")}
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, ValueError):
+                    continue
+                if isinstance(record, dict) and "file" in record and "error" not in record:
+                    done.add(record["file"])  # Failed files are retried on --resume
+    return done
+
+
+def _process(job: tuple[str, bool]) -> dict:
+    path, use_llm = job
+    try:
+        # Compact records: the clause results cross the process boundary as arrays + text
+        return {"file": path, **analyze_file(path, use_llm=use_llm, compact=True)}
+    except Exception as e:
+        return {"file": path, "error": f"{type(e).__name__}: {e}"}
+
+
+def _to_json(record: dict) -> str:
+    """One output line; ResultStore clauses become dicts only here."""
+    if "clauses" in record:
+        record = {**record, "clauses": record["clauses"].to_dicts()}
+    return json.dumps(record, ensure_ascii=False)
+
+
+def run(paths: list[str], output: str, workers: int, use_llm: bool = False, append: bool = False,
+        fmt: str = "files") -> dict:
+    """Analyze `paths` in a process pool, streaming records to `output` as they finish."""
+    stats = {"files": 0, "errors": 0, "clauses": 0}
+    start = time.perf_counter()
+    if fmt == "files":
+        out = open(output, "a" if append else "w", encoding="utf-8")
+        exporter = None
+    else:
+        exporter, out = open_exporter(fmt, output, append=append)
+    with out, Pool(workers) as pool:
+        jobs = ((p, use_llm) for p in paths)
+        for record in pool.imap_unordered(_process, jobs, chunksize=4):
+            stats["files"] += 1
+            if "error" in record:
+                stats["errors"] += 1
+            else:
+                stats["clauses"] += record["summary"]["clauses"]
+            if exporter is None:
+                out.write(_to_json(record) + "\n")
+            elif "error" in record:
+                print(json.dumps(record, ensure_ascii=False), file=sys.stderr)
+            else:
+                exporter.write(record["clauses"], file=record["file"])
+        if exporter is not None:
+            exporter.close()
+    stats["seconds"] = round(time.perf_counter() - start, 2)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.batch", description=__doc__.splitlines()[0])
+    parser.add_argument("input_dir")
+    parser.add_argument("-o", "--output", default="results.jsonl")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--llm", action="store_true", help="add Groq analysis per clause")
+    parser.add_argument("--no-recursive", action="store_true")
+    parser.add_argument("--resume", action="store_true", help="skip files already in the output")
+    parser.add_argument("-f", "--format", default="files", choices=["files", *EXPORTERS],
+                        help="files: one JSON record per file (default); jsonl/csv/parquet: one row per clause")
+    args = parser.parse_args(argv)
+    if args.format not in ("files", *available_formats()):
+        parser.error(f"{args.format} output needs pyarrow (pip install pyarrow)")
+    if args.resume and args.format == "parquet":
+        parser.error("--resume cannot append to parquet output")
+
+    paths = find_contracts(args.input_dir, recursive=not args.no_recursive)
+    if args.resume:
+        done = _already_done(args.output, args.format)
+        paths = [p for p in paths if p not in done]
+    if not paths:
+        print("No contracts to process.", file=sys.stderr)
+        return
+
+    stats = run(paths, args.output, args.workers, use_llm=args.llm, append=args.resume, fmt=args.format)
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,159 @@
 import re
 
+# One alternation for every header style (English, Hindi, numbered), so the text
+# is scanned once. A header only counts at the start of the text or right after
+# sentence/line punctuation, which skips in-line references like "per Section 5".
+# Keyword headers take the whole dotted number ("Section 2.3"); a bare number
+# must not follow a digit, dot or comma, so the "5" of "3.5 years" or the "00"
+# of "1,000.00" is never mistaken for a new section.
+HEADER_RE = re.compile(
+    r'(?:^|(?<=[.!?;:।\n]))\s*(?P<header>'
+    r'(?:ARTICLE|Section|Clause)\s*\d+(?:\.\d+)*'
+    r'|(?:धारा|अनुच्छेद|परिच्छेद)\s*\d+(?:\.\d+)*'
+    r'|(?<![\d.,])\d+(?:\.\d+)*\.?(?=\s)'
+    r')',
+    re.IGNORECASE,
+)
+SENTENCE_END_RE = re.compile(r'(?<=[.?!।])\s+')
+
+# Only used for text outside any numbered section (preambles, unstructured contracts)
+FALLBACK_KEYWORDS = {
+    "en": ['shall', 'must', 'buyer', 'seller', 'transfer', 'assign', 'exclusive'],
+    "hi": ['करेगा', 'करेगी', 'होगा', 'होगी', 'अधिकार', 'स्वामित्व', 'हस्तांतरण', 'क्रेता', 'विक्रेता'],
+}
+MAX_CLAUSE_CHARS = 1500  # Longer sections are split at sentence ends, never truncated
+
+
+def _trim(text: str, start: int, end: int) -> tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _sentence_spans(text: str, start: int, end: int):
+    for m in SENTENCE_END_RE.finditer(text, start, end):
+        yield start, m.start()
+        start = m.end()
+    if start < end:
+        yield start, end
+
+
+def _pack_sentences(text: str, start: int, end: int, max_chars: int):
+    """Split one long span into consecutive sentence groups of at most max_chars."""
+    piece_start = piece_end = start
+    for s, e in _sentence_spans(text, start, end):
+        if piece_end > piece_start and e - piece_start > max_chars:
+            yield piece_start, piece_end
+            piece_start = s
+        piece_end = e
+    if piece_end > piece_start:
+        yield piece_start, piece_end
+
+
+def segment(text: str, lang: str | None = None, min_len: int = 80, max_len: int = MAX_CLAUSE_CHARS,
+            seen: set | None = None, continuation: bool = False) -> list[tuple[int, int]]:
+    """Single-pass clause segmenter returning (start, end) offsets into `text`.
+
+    Each clause runs from one section header to the next. Text before the first
+    header, or a document without headers, falls back to keyword sentences.
+    Duplicate clauses (same normalized text) are dropped via a set of hashes;
+    pass `seen` to share it across calls. No clause limit is applied. With
+    `continuation`, leading text is the tail of a section started earlier.
+    """
+    seen = set() if seen is None else seen
+    keywords = FALLBACK_KEYWORDS.get(lang) or FALLBACK_KEYWORDS["en"] + FALLBACK_KEYWORDS["hi"]
+    spans = []
+
+    def add(start, end, require_keyword=False):
+        start, end = _trim(text, start, end)
+        if end - start <= min_len:
+            return
+        piece = text[start:end]
+        if require_keyword and not any(k in piece.lower() for k in keywords):
+            return
+        key = hash(" ".join(piece.split()).casefold())
+        if key not in seen:
+            seen.add(key)
+            spans.append((start, end))
+
+    def add_section(start, end):
+        if end - start > max_len:
+            for s, e in _pack_sentences(text, start, end, max_len):
+                add(s, e)
+        else:
+            add(start, end)
+
+    starts = [m.start("header") for m in HEADER_RE.finditer(text)]
+    body_start = starts[0] if starts else len(text)
+    if continuation:
+        add_section(0, body_start)
+    else:
+        for s, e in _sentence_spans(text, 0, body_start):
+            add(s, e, require_keyword=True)
+
+    for i, start in enumerate(starts):
+        add_section(start, starts[i + 1] if i + 1 < len(starts) else len(text))
+    return spans
+
+
 def split_clauses(text: str, lang: str = "en") -> list[str]:
     """Pure regex clause splitter - NO NLTK dependency."""
-    
     if not text or len(text.strip()) < 50:
         return []
-    
-    # Clean text
-    text = re.sub(r'\s+', ' ', text.strip())
-    
-    if lang == "hi":
-        # Hindi legal patterns: धारा, अनुच्छेद, numbers
-        patterns = [
-            r'धारा\s*\d+[^\.]*(?=\.|धारा|\n|$)',
-            r'अनुच्छेद\s*\d+[^\.]*(?=\.|अनुच्छेद|\n|$)',
-            r'परिच्छेद\s*\d+[^\.]*(?=\.|धारा|\n|$)',
-            r'\d+\.[^\.]*(?=\.|धारा|\n|$)'
-        ]
-    else:
-        # English legal patterns
-        patterns = [
-            r'(?:Section|Clause|Article)\s*\d+[^\.]*(?=\.|Section|Clause|\n|$)',
-            r'\d+\.[^\.]*(?=\.|Section|Clause|\n|$)'
-        ]
-    
-    clauses = []
-    for pattern in patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE | re.MULTILINE)
-        clauses.extend(matches)
-    
-    # Fallback: Split by sentences (periods + 30+ chars)
-    if not clauses:
-        fallback = re.split(r'(?<=[।.?!])\s+', text)
-        clauses = [c.strip() for c in fallback if len(c) > 30]
-    
-    # Limit + clean
-    clauses = clauses[:15]
-    return [c.strip() for c in clauses if len(c) > 40]
+    return [text[s:e] for s, e in segment(text, lang, min_len=40)]
+
+
+def split_contract(text: str, lang: str | None = None) -> list[str]:
+    """Clauses of a whole contract, copied out of `text`."""
+    return [text[s:e] for s, e in segment(text, lang)]
+
+
+def iter_clause_spans(chunks, lang: str | None = None, max_buffer: int = 64_000):
+    """Incremental split_contract over a stream of text chunks (e.g. PDF pages).
+
+    Yields `(clause, start, end)`, with offsets into the chunks joined by single
+    spaces (what read_pdf / read_docx return). Text up to the last section
+    header seen is complete and is segmented and emitted straight away; only
+    the unfinished tail is carried over, capped at `max_buffer` characters by
+    cutting at a sentence end. Memory therefore stays flat however long the
+    document is.
+    """
+    seen = set()
+    buffer = ""
+    base = 0  # Document offset of buffer[0]
+    consumed = 0  # Document length of the chunks read so far
+    in_section = False  # True once a header was seen: headerless buffers continue a section
+    for chunk in chunks:
+        chunk_start = consumed + 1 if consumed else 0
+        consumed = chunk_start + len(chunk)
+        if buffer:
+            buffer = f"{buffer} {chunk}"
+        else:
+            buffer, base = chunk, chunk_start
+        cut = 0
+        for m in HEADER_RE.finditer(buffer):
+            cut = m.start("header")
+        if cut:
+            in_section_next = True
+        elif len(buffer) > max_buffer:
+            in_section_next = in_section or HEADER_RE.search(buffer) is not None
+            ends = [m.end() for m in SENTENCE_END_RE.finditer(buffer, 0, len(buffer) - 1)]
+            cut = ends[-1] if ends else len(buffer)
+        if cut:
+            ready = buffer[:cut]
+            for s, e in segment(ready, lang, seen=seen, continuation=in_section):
+                yield ready[s:e], base + s, base + e
+            in_section = in_section_next
+            buffer = buffer[cut:]
+            base += cut
+    if buffer.strip():
+        for s, e in segment(buffer, lang, seen=seen, continuation=in_section):
+            yield buffer[s:e], base + s, base + e
+
+
+def iter_clauses(chunks, lang: str | None = None, max_buffer: int = 64_000):
+    """Clause strings of iter_clause_spans."""
+    for clause, _, _ in iter_clause_spans(chunks, lang, max_buffer):
+        yield clause
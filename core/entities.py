@@ -1,24 +1,17 @@
-import re
+from core.matcher import scan_clause
 
 def extract_entities(text: str) -> dict:
-    """Pure regex entity extraction."""
-    text_lower = text.lower()
-    
+    """Entity extraction from the shared single-pass matcher."""
+    scan = scan_clause(text, with_orgs=True)
     return {
-        "IP_TERMS": re.findall(r'intellectual\s+property|IP|ownership|assign|license|exclusive|non-compete|patent|copyright', text, re.I),
-        "ORG": re.findall(r'\b[A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})?\b', text),
-        "MONEY": re.findall(r'₹?\s*[\d,]+\.?\d*\s*(?:lakh|crore|thousand)?', text),
-        "DATE": re.findall(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', text),
-        "CLAUSE_TYPE": "obligation"  # Default
+        "IP_TERMS": scan["ip_terms"],
+        "ORG": scan["orgs"],
+        "MONEY": scan["money"],
+        "DATE": scan["dates"],
+        "CLAUSE_TYPE": scan["clause_type"],
+        "SPANS": scan["spans"]
     }
 
 def classify_clause_type(text: str) -> str:
     """Simple keyword classification."""
-    text_lower = text.lower()
-    if any(word in text_lower for word in ['shall', 'must', 'obligation']):
-        return "obligation"
-    elif any(word in text_lower for word in ['right', 'entitled', 'may']):
-        return "right"
-    elif any(word in text_lower for word in ['prohibited', 'cannot', 'restrict']):
-        return "prohibition"
-    return "neutral"
+    return scan_clause(text)["clause_type"]
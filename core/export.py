@@ -0,0 +1,185 @@
+"""Streaming machine-readable exports of clause results: JSONL, CSV and Parquet.
+
+Each clause becomes one flat row:
+- source file, clause index and character offsets;
+- rule-based labels, score and entity counts;
+- the matched terms;
+- the LLM review fields, when a review is present;
+- the clause text.
+
+Exporters take a results list or a core.records.ResultStore and write row by
+row. JSONL and CSV rows go straight to the output. Parquet rows are buffered
+only up to one row group (pyarrow, optional, imported on first use). Several
+`write()` calls append to the same output, which is how the batch CLI streams
+a whole portfolio into one file.
+"""
+import csv
+import io
+import json
+import os
+
+from core import metrics
+from core.lazy import lazy_import
+
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+ROW_GROUP_ROWS = 10_000
+TERM_SEPARATOR = "; "  # CSV cells hold term lists joined with this
+LLM_FIELDS = ("ownership", "exclusivity", "favor", "risk_reason", "suggested_fix")
+COLUMNS = (
+    "file", "index", "start", "end", "language", "clause_type", "risk", "score",
+    "ownership", "exclusivity", "favor", "buyer_seller", "ip_count", "obligation_count",
+    "ip_terms", "obligations", "money", "explanation", "suggested_fix",
+    *(f"llm_{name}" for name in LLM_FIELDS), "clause",
+)
+LIST_COLUMNS = ("ip_terms", "obligations", "money")
+MIME_TYPES = {"jsonl": "application/x-ndjson", "csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+def iter_rows(results, file: str | None = None):
+    """Flat export rows, one per clause; offsets into the extracted document text, None when unknown."""
+    to_dict = getattr(results, "to_dict", None)
+    for i in range(len(results)):
+        r = to_dict(i) if to_dict else results[i]
+        start, end = r.get("start"), r.get("end")
+        entities = r.get("entities") or {}
+        analysis = r.get("analysis") or {}
+        yield {
+            "file": file, "index": i, "start": start, "end": end,
+            "language": r.get("language"), "clause_type": r.get("clause_type"),
+            "risk": r.get("risk"), "score": r.get("score"),
+            "ownership": r.get("ownership"), "exclusivity": r.get("exclusivity"), "favor": r.get("favor"),
+            "buyer_seller": bool(entities.get("buyer_seller")),
+            "ip_count": entities.get("ip_count", 0), "obligation_count": entities.get("obligation_count", 0),
+            **{name: list(entities.get(name, ())) for name in LIST_COLUMNS},
+            "explanation": r.get("explanation"), "suggested_fix": r.get("suggested_fix"),
+            **{f"llm_{name}": analysis.get(name) for name in LLM_FIELDS},
+            "clause": r["clause"],
+        }
+
+
+class JSONLExporter:
+    """One JSON object per clause row; `out` is a text stream."""
+
+    binary = False
+
+    def __init__(self, out, append: bool = False):
+        self.out = out
+        self.rows = 0
+
+    def write(self, results, file: str | None = None):
+        for row in iter_rows(results, file):
+            self.out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self.rows += 1
+
+    def close(self):
+        pass
+
+
+class CSVExporter:
+    """CSV with a header row (skipped when appending); term lists are joined with TERM_SEPARATOR."""
+
+    binary = False
+
+    def __init__(self, out, append: bool = False):
+        self.out = out
+        self.rows = 0
+        self._writer = csv.DictWriter(out, fieldnames=COLUMNS)
+        if not append:
+            self._writer.writeheader()
+
+    def write(self, results, file: str | None = None):
+        for row in iter_rows(results, file):
+            for name in LIST_COLUMNS:
+                row[name] = TERM_SEPARATOR.join(row[name])
+            self._writer.writerow(row)
+            self.rows += 1
+
+    def close(self):
+        pass
+
+
+def _parquet_schema():
+    string, int32 = pa.string(), pa.int32()
+    types = {"index": int32, "start": pa.int64(), "end": pa.int64(), "score": int32, "buyer_seller": pa.bool_(),
+             "ip_count": int32, "obligation_count": int32, **{name: pa.list_(string) for name in LIST_COLUMNS}}
+    return pa.schema([(name, types.get(name, string)) for name in COLUMNS])
+
+
+class ParquetExporter:
+    """Parquet written one row group at a time; `out` is a binary stream or path."""
+
+    binary = True
+
+    def __init__(self, out, append: bool = False):
+        if append:
+            raise ValueError("Parquet output cannot be appended to")
+        self.schema = _parquet_schema()
+        self.rows = 0
+        self._writer = pq.ParquetWriter(out, self.schema, compression="zstd")
+        self._pending = []
+
+    def write(self, results, file: str | None = None):
+        for row in iter_rows(results, file):
+            self._pending.append(row)
+            if len(self._pending) >= ROW_GROUP_ROWS:
+                self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self._writer.write_table(pa.Table.from_pylist(self._pending, schema=self.schema))
+            self.rows += len(self._pending)
+            self._pending = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+EXPORTERS = {"jsonl": JSONLExporter, "csv": CSVExporter, "parquet": ParquetExporter}
+
+
+_parquet_ok = None
+def parquet_available() -> bool:
+    """True when pyarrow imports cleanly (it is optional and not in requirements.txt)."""
+    global _parquet_ok
+    if _parquet_ok is None:
+        try:
+            pq.ParquetWriter
+            _parquet_ok = True
+        except ImportError:
+            _parquet_ok = False
+    return _parquet_ok
+
+
+def available_formats() -> list[str]:
+    return [fmt for fmt in EXPORTERS if fmt != "parquet" or parquet_available()]
+
+
+def open_exporter(fmt: str, path: str, append: bool = False):
+    """(exporter, file object) for writing `fmt` to `path`; close the exporter, then the file."""
+    exporter_cls = EXPORTERS[fmt]
+    append = append and os.path.exists(path) and os.path.getsize(path) > 0
+    if exporter_cls.binary:
+        f = open(path, "ab" if append else "wb")
+    else:
+        f = open(path, "a" if append else "w", encoding="utf-8", newline="")
+    return exporter_cls(f, append=append), f
+
+
+def render_export(results, fmt: str, file: str | None = None) -> bytes:
+    """Whole export as bytes, for download buttons."""
+    exporter_cls = EXPORTERS[fmt]
+    buffer = io.BytesIO()
+    out = buffer if exporter_cls.binary else io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+    with metrics.span("export", format=fmt):
+        exporter = exporter_cls(out)
+        exporter.write(results, file)
+        exporter.close()
+        if not exporter_cls.binary:
+            out.flush()
+            out.detach()
+    data = buffer.getvalue()
+    metrics.inc("bytes_processed_total", len(data), stage=f"export_{fmt}")
+    return data
@@ -1,5 +1,5 @@
+from core.language import detect_language as _detect
+
 def detect_language(text: str) -> str:
-    for c in text:
-        if '\u0900' <= c <= '\u097F':
-            return "Hindi"
-    return "English"
+    """"Hindi" if the text contains any Devanagari at all."""
+    return "Hindi" if _detect(text, threshold=0) == "hi" else "English"
@@ -0,0 +1,331 @@
+"""SQLite-backed analysis job queue and worker pool.
+
+    python -m core.jobs worker --workers 4
+    python -m core.jobs submit contract.pdf [--priority 5] [--llm] [--audit] [--doc "Acme NDA"]
+    python -m core.jobs status [JOB_ID]
+    python -m core.jobs cancel JOB_ID
+    python -m core.jobs purge
+
+`app.py` (with JOB_QUEUE_ENABLED=1) and the CLI submit the raw file bytes.
+Worker processes claim the highest-priority queued job and do everything
+else: extraction, scoring, the LLM review, `log_audit` and the PDF report.
+The Streamlit script thread only polls. Workers report progress at each
+stage boundary, which is also where a cancellation takes effect. A running
+job whose worker stops heartbeating is put back in the queue. Finished jobs
+are kept for JOBS_RETENTION_HOURS and then purged.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from io import BytesIO
+
+from core import metrics
+
+JOBS_FILE = os.getenv("JOBS_PATH", "data/jobs.sqlite")
+RETENTION_HOURS = float(os.getenv("JOBS_RETENTION_HOURS", "24"))
+POLL_SECONDS = float(os.getenv("JOBS_POLL_SECONDS", "0.5"))
+HEARTBEAT_SECONDS = 10
+STALE_SECONDS = 6 * HEARTBEAT_SECONDS  # A running job without a heartbeat for this long is requeued
+PURGE_EVERY = 300  # Seconds between retention sweeps in each worker
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+_STATUS_COLUMNS = ("id, name, doc, priority, status, progress, message, error, cancel_requested,"
+                   " created, started, finished, worker")
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job was cancelled."""
+
+
+class JobQueue:
+    """Priority job queue in SQLite; safe to share between processes (one instance per process)."""
+
+    def __init__(self, path: str = JOBS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, options TEXT NOT NULL, doc TEXT,"
+            " priority INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL, progress REAL NOT NULL DEFAULT 0,"
+            " message TEXT NOT NULL DEFAULT '', error TEXT, cancel_requested INTEGER NOT NULL DEFAULT 0,"
+            " input BLOB, result TEXT, report BLOB, created REAL NOT NULL, started REAL, finished REAL,"
+            " heartbeat REAL, worker TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs(status, priority DESC, id)")
+
+    def submit(self, name: str, data: bytes, use_llm: bool = False, audit: bool = False,
+               doc: str | None = None, priority: int = 0) -> int:
+        """Queue the analysis of one file (`name` picks the extractor); higher priority runs first."""
+        options = json.dumps({"use_llm": use_llm, "audit": audit})
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (name, options, doc, priority, status, message, input, created)"
+                " VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                (name, options, doc, priority, QUEUED, sqlite3.Binary(data), time.time()))
+        metrics.inc("jobs_total", status=QUEUED)
+        return cur.lastrowid
+
+    def claim(self, worker: str) -> dict | None:
+        """Atomically take the next queued job (highest priority, then oldest) for `worker`."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs of workers that died mid-run go back in the queue (or end, if cancelled)
+                self._conn.execute(
+                    "UPDATE jobs SET status = CASE cancel_requested WHEN 1 THEN ? ELSE ? END,"
+                    " finished = CASE cancel_requested WHEN 1 THEN ? END, worker = NULL,"
+                    " message = CASE cancel_requested WHEN 1 THEN 'cancelled' ELSE 'requeued' END"
+                    " WHERE status = ? AND heartbeat < ?",
+                    (CANCELLED, QUEUED, now, RUNNING, now - STALE_SECONDS))
+                row = self._conn.execute(
+                    "SELECT id, name, options, doc, input FROM jobs WHERE status = ?"
+                    " ORDER BY priority DESC, id LIMIT 1", (QUEUED,)).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, started = ?, heartbeat = ?, worker = ?,"
+                        " message = 'starting' WHERE id = ?", (RUNNING, now, now, worker, row[0]))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, name, options, doc, data = row
+        return {"id": job_id, "name": name, "doc": doc, "data": bytes(data), **json.loads(options)}
+
+    def progress(self, job_id: int, progress: float, message: str):
+        """Record progress and heartbeat; raises JobCancelled if a cancel was requested."""
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET progress = ?, message = ?, heartbeat = ? WHERE id = ?",
+                               (progress, message, time.time(), job_id))
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row[0]:
+            raise JobCancelled(job_id)
+
+    def heartbeat(self, job_id: int):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time(), job_id))
+
+    def complete(self, job_id: int, report: dict, pdf: bytes | None):
+        self._finish(job_id, DONE, "done", result=json.dumps(report, ensure_ascii=False),
+                     report=sqlite3.Binary(pdf) if pdf is not None else None, progress=1.0)
+
+    def fail(self, job_id: int, error: str):
+        self._finish(job_id, FAILED, "failed", error=error)
+
+    def _finish(self, job_id: int, status: str, message: str, **fields):
+        columns = "".join(f", {name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET status = ?, message = ?, finished = ?, input = NULL{columns} WHERE id = ?",
+                (status, message, time.time(), *fields.values(), job_id))
+        metrics.inc("jobs_total", status=status)
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued job now, or ask its worker to stop at the next stage boundary."""
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, message = 'cancelled', finished = ?, input = NULL,"
+                " cancel_requested = 1 WHERE id = ? AND status = ?", (CANCELLED, now, job_id, QUEUED))
+            if cur.rowcount:
+                cancelled = True
+            else:
+                cur = self._conn.execute(
+                    "UPDATE jobs SET cancel_requested = 1, message = 'cancelling' WHERE id = ? AND status = ?",
+                    (job_id, RUNNING))
+                cancelled = bool(cur.rowcount)
+        if cancelled:
+            metrics.inc("jobs_cancel_requests_total")
+        return cancelled
+
+    def mark_cancelled(self, job_id: int):
+        self._finish(job_id, CANCELLED, "cancelled")
+
+    def get(self, job_id: int) -> dict | None:
+        """Status fields of one job (no input, result or report payloads)."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_STATUS_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._status(row) if row else None
+
+    def recent(self, limit: int = 50) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {_STATUS_COLUMNS} FROM jobs ORDER BY id DESC LIMIT ?",
+                                      (limit,)).fetchall()
+        return [self._status(row) for row in rows]
+
+    @staticmethod
+    def _status(row) -> dict:
+        names = [c.strip() for c in _STATUS_COLUMNS.split(",")]
+        status = dict(zip(names, row))
+        status["cancel_requested"] = bool(status["cancel_requested"])
+        return status
+
+    def result(self, job_id: int) -> tuple[dict, bytes | None] | None:
+        """(report, PDF bytes) of a finished job, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT result, report FROM jobs WHERE id = ? AND status = ?",
+                                     (job_id, DONE)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), bytes(row[1]) if row[1] is not None else None
+
+    def counts(self) -> dict:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def purge(self, retention_hours: float = RETENTION_HOURS) -> int:
+        """Delete finished jobs older than the retention period; returns how many."""
+        cutoff = time.time() - retention_hours * 3600
+        with self._lock:
+            cur = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED))}) AND finished < ?",
+                (*FINISHED, cutoff))
+        return cur.rowcount
+
+
+# Lazy shared instance (one per process)
+_queue = None
+_queue_lock = threading.Lock()
+def get_queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+    return _queue
+
+
+def run_job(queue: JobQueue, job: dict):
+    """Extract, analyze (LLM and audit included) and render the report for one claimed job."""
+    from core.parser import extract_text
+    from core.pipeline import PipelineError, analyze_revision, analyze_text
+    from core.report import render_report
+
+    job_id = job["id"]
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(HEARTBEAT_SECONDS):
+            queue.heartbeat(job_id)
+
+    threading.Thread(target=beat, name=f"job-{job_id}-heartbeat", daemon=True).start()
+    try:
+        with metrics.span("job"):
+            queue.progress(job_id, 0.05, "extracting text")
+            text = extract_text(job["name"], BytesIO(job.pop("data")))
+            if not text.strip():
+                raise PipelineError("Could not extract text from file")
+            queue.progress(job_id, 0.25, "analyzing clauses" + (" with AI review" if job["use_llm"] else ""))
+
+            def review_progress(done, total):  # Cancellation point after every LLM request
+                queue.progress(job_id, 0.25 + 0.6 * done / total, f"AI review ({done}/{total} requests)")
+
+            if job["doc"]:
+                report = analyze_revision(job["doc"], text, use_llm=job["use_llm"], audit=job["audit"],
+                                          progress=review_progress)
+            else:
+                report = analyze_text(text, use_llm=job["use_llm"], audit=job["audit"], progress=review_progress)
+            queue.progress(job_id, 0.85, "building report")
+            pdf = render_report(report["clauses"])
+            queue.progress(job_id, 0.95, "saving results")  # Last cancellation point
+        queue.complete(job_id, report, pdf)
+    except JobCancelled:
+        queue.mark_cancelled(job_id)
+    except Exception as e:
+        queue.fail(job_id, f"{type(e).__name__}: {e}")
+    finally:
+        stop.set()
+
+
+def worker_loop(path: str = JOBS_FILE, name: str | None = None, stop=None):
+    """Claim and run jobs until `stop` (a multiprocessing Event) is set."""
+    if stop is not None:  # Pool member: Ctrl-C reaches the parent, which lets the current job finish
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    queue = JobQueue(path)
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    last_purge = 0.0
+    while stop is None or not stop.is_set():
+        if time.monotonic() - last_purge > PURGE_EVERY:
+            queue.purge()
+            last_purge = time.monotonic()
+        job = queue.claim(name)
+        if job is None:
+            time.sleep(POLL_SECONDS)
+            continue
+        run_job(queue, job)
+
+
+def serve_workers(workers: int, path: str = JOBS_FILE):
+    """Run `workers` worker processes until interrupted; each finishes its current job first."""
+    stop = multiprocessing.Event()
+    procs = [multiprocessing.Process(target=worker_loop, args=(path, None, stop), name=f"jobs-worker-{i}")
+             for i in range(workers)]
+    for proc in procs:
+        proc.start()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        stop.set()
+        for proc in procs:
+            proc.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.jobs", description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=JOBS_FILE, help="queue database (default: JOBS_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    worker = commands.add_parser("worker", help="run a pool of worker processes")
+    worker.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    submit = commands.add_parser("submit", help="queue files for analysis")
+    submit.add_argument("files", nargs="+")
+    submit.add_argument("-p", "--priority", type=int, default=0)
+    submit.add_argument("--llm", action="store_true", help="add Groq analysis per clause")
+    submit.add_argument("--audit", action="store_true", help="write the audit log")
+    submit.add_argument("--doc", help="track revisions under this document name")
+    status = commands.add_parser("status", help="show one job or the most recent ones")
+    status.add_argument("job_id", type=int, nargs="?")
+    cancel = commands.add_parser("cancel", help="cancel a queued or running job")
+    cancel.add_argument("job_id", type=int)
+    commands.add_parser("purge", help="delete finished jobs past the retention period")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        serve_workers(args.workers, args.db)
+        return
+    queue = JobQueue(args.db)
+    if args.command == "submit":
+        for path in args.files:
+            with open(path, "rb") as f:
+                job_id = queue.submit(os.path.basename(path), f.read(), use_llm=args.llm, audit=args.audit,
+                                      doc=args.doc, priority=args.priority)
+            print(json.dumps({"id": job_id, "file": path}))
+    elif args.command == "status":
+        jobs = [queue.get(args.job_id)] if args.job_id is not None else queue.recent()
+        for job in jobs:
+            print(json.dumps(job))
+    elif args.command == "cancel":
+        if not queue.cancel(args.job_id):
+            print(f"Job {args.job_id} is not queued or running.", file=sys.stderr)
+            sys.exit(1)
+    elif args.command == "purge":
+        print(json.dumps({"purged": queue.purge()}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
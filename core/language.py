@@ -1,25 +1,79 @@
-import spacy
-import nltk
 import os
 from pathlib import Path
+from core import lazy
 
-# NLTK setup (cloud-safe, no downloads)
-nltk_data_path = Path("./nltk_data")
-os.makedirs(nltk_data_path, exist_ok=True)
-nltk.data.path.append(str(nltk_data_path))
+spacy = lazy.lazy_import("spacy")
 
-# Create minimal spaCy pipelines (NO model downloads needed)
-nlp_en = spacy.blank("en")
-nlp_en.add_pipe("senter")  # Sentence detection only
+def _setup_nltk():
+    """NLTK setup (cloud-safe, no downloads); optional, not in requirements.txt"""
+    try:
+        import nltk
+    except ImportError:
+        return None
+    nltk_data_path = Path("./nltk_data")
+    os.makedirs(nltk_data_path, exist_ok=True)
+    nltk.data.path.append(str(nltk_data_path))
+    return nltk
 
-nlp_hi = spacy.blank("hi")
-nlp_hi.add_pipe("senter")
+def _blank_pipeline(lang: str):
+    """Minimal spaCy pipeline (NO model downloads needed)"""
+    nlp = spacy.blank(lang)
+    # Rule-based: a trainable "senter" raises E109 without initialize() and weights
+    nlp.add_pipe("sentencizer")
+    return nlp
 
-def detect_language(text: str) -> str:
-    """Unicode detection for Hindi."""
-    hindi_chars = sum(1 for c in text if '\u0900' <= c <= '\u097F')
-    return "hi" if hindi_chars > len(text) * 0.1 else "en"
+# Built on first use, not at import time
+lazy.register("nltk", _setup_nltk)
+lazy.register("nlp_en", lambda: _blank_pipeline("en"))
+lazy.register("nlp_hi", lambda: _blank_pipeline("hi"))
+
+# Devanagari (U+0900–U+097F) is exactly the UTF-8 sequences starting E0 A4 / E0 A5;
+# E0 is never a continuation byte, so counting these pairs counts characters.
+_DEVANAGARI_LEADS = (b"\xe0\xa4", b"\xe0\xa5")
+HINDI_THRESHOLD = 0.1  # share of characters that must be Devanagari
+SAMPLE_WINDOW = 4096
+MAX_SAMPLE_WINDOWS = 8
+
+def devanagari_count(text: str) -> int:
+    """Devanagari characters in `text`, counted at C speed on the UTF-8 bytes."""
+    data = text.encode("utf-8", "ignore")
+    return data.count(_DEVANAGARI_LEADS[0]) + data.count(_DEVANAGARI_LEADS[1])
+
+def _windows(length: int):
+    """Evenly spaced sample windows, visited ends-first so early exits see both ends."""
+    count = min(MAX_SAMPLE_WINDOWS, -(-length // SAMPLE_WINDOW))
+    step = (length - SAMPLE_WINDOW) / (count - 1)
+    order = sorted(range(count), key=lambda i: (min(i, count - 1 - i), i))
+    for i in order:
+        start = int(i * step)
+        yield start, start + SAMPLE_WINDOW
+
+def detect_language(text: str, threshold: float = HINDI_THRESHOLD) -> str:
+    """Unicode detection for Hindi: "hi" when Devanagari exceeds `threshold` of the text.
+
+    Long texts are judged from at most MAX_SAMPLE_WINDOWS windows, stopping
+    early once the running share is clearly above or below the threshold.
+    `threshold=0` means "any Devanagari at all" and always scans everything.
+    """
+    if threshold <= 0:
+        data = text.encode("utf-8", "ignore")
+        return "hi" if any(lead in data for lead in _DEVANAGARI_LEADS) else "en"
+    if len(text) <= SAMPLE_WINDOW * 2:
+        return "hi" if devanagari_count(text) > len(text) * threshold else "en"
+
+    hindi = seen = 0
+    for n, (start, end) in enumerate(_windows(len(text)), 1):
+        hindi += devanagari_count(text[start:end])
+        seen += end - start
+        share = hindi / seen
+        if n >= 2 and (share > threshold * 2 or share < threshold / 2):
+            break
+    return "hi" if share > threshold else "en"
+
+def detect_languages(clauses: list[str], threshold: float = HINDI_THRESHOLD) -> list[str]:
+    """Per-clause labels, so mixed Hindi/English contracts route each clause correctly."""
+    return [detect_language(c, threshold) for c in clauses]
 
 def get_nlp_pipeline(lang: str):
     """Get spaCy pipeline."""
-    return nlp_hi if lang == "hi" else nlp_en
+    return lazy.get("nlp_hi" if lang == "hi" else "nlp_en")
@@ -0,0 +1,72 @@
+"""Lazy loading for heavy libraries and NLP pipelines.
+
+`lazy_import("fitz")` returns a stand-in module that performs the real import
+on first attribute access, and `register(name, factory)` / `get(name)` build
+expensive objects (spaCy pipelines, ReportLab styles) once, on first use. A
+pasted-text session therefore never pays for PyMuPDF, python-docx or spaCy.
+"""
+import importlib
+import threading
+import types
+
+_lock = threading.RLock()
+_factories = {}
+_instances = {}
+_MISSING = object()  # A factory may legitimately build None (e.g. an optional library is absent)
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with _lock:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def is_loaded(module) -> bool:
+    """True once a LazyModule has performed its real import."""
+    return not isinstance(module, LazyModule) or module.__dict__["_lazy_module"] is not None
+
+
+def register(name: str, factory):
+    """Register a zero-argument factory; it runs on the first `get(name)`."""
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+
+def get(name: str):
+    """The object built by `name`'s factory; the factory runs once, even when it returns None."""
+    instance = _instances.get(name, _MISSING)
+    if instance is _MISSING:
+        with _lock:
+            instance = _instances.get(name, _MISSING)
+            if instance is _MISSING:
+                instance = _factories[name]()
+                _instances[name] = instance
+    return instance
+
+
+def loaded() -> list[str]:
+    """Names of registered objects that have been built so far."""
+    return sorted(_instances)
@@ -0,0 +1,214 @@
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core import metrics
+
+# OpenAI-compatible endpoint; point GROQ_BASE_URL at a local stub server for testing
+DEFAULT_BASE_URL = "https://api.groq.com/openai/v1"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+MAX_IN_FLIGHT = int(os.getenv("GROQ_MAX_IN_FLIGHT", "4"))
+RATE_LIMIT = float(os.getenv("GROQ_RATE_LIMIT", "2.0"))  # requests per second
+
+
+class LLMHTTPError(Exception):
+    """Non-2xx reply from the chat completions endpoint."""
+
+    def __init__(self, status: int, message: str = "", retry_after: float | None = None):
+        super().__init__(f"HTTP {status}: {message[:200]}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then take them."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def get_base_url() -> str:
+    return os.getenv("GROQ_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+
+
+def _request(payload: dict, api_key: str, base_url: str | None) -> urllib.request.Request:
+    return urllib.request.Request(
+        f"{base_url or get_base_url()}/chat/completions",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+        method="POST",
+    )
+
+
+def _http_error(e: urllib.error.HTTPError) -> LLMHTTPError:
+    metrics.inc("llm_requests_total", status=str(e.code))
+    retry_after = e.headers.get("Retry-After") if e.headers else None
+    try:
+        retry_after = float(retry_after) if retry_after else None
+    except ValueError:
+        retry_after = None
+    return LLMHTTPError(e.code, e.read().decode("utf-8", errors="ignore"), retry_after)
+
+
+def _count_usage(usage: dict | None):
+    usage = usage or {}
+    metrics.inc("llm_tokens_total", usage.get("prompt_tokens", 0), kind="prompt")
+    metrics.inc("llm_tokens_total", usage.get("completion_tokens", 0), kind="completion")
+
+
+def chat_completion(payload: dict, api_key: str, base_url: str | None = None, timeout: float = 60) -> dict:
+    """POST one chat completion request and return the decoded JSON reply."""
+    request = _request(payload, api_key, base_url)
+    try:
+        with metrics.span("llm_request", model=payload.get("model", "")):
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                reply = json.loads(response.read().decode("utf-8"))
+        metrics.inc("llm_requests_total", status="ok")
+        _count_usage(reply.get("usage"))
+        return reply
+    except urllib.error.HTTPError as e:
+        raise _http_error(e) from e
+
+
+def _iter_sse(response):
+    """Content deltas from an OpenAI-style server-sent event stream."""
+    with response:
+        for raw in response:
+            line = raw.decode("utf-8").strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            event = json.loads(data)
+            # Groq reports usage on the last chunk under x_groq
+            usage = event.get("usage") or (event.get("x_groq") or {}).get("usage")
+            if usage:
+                _count_usage(usage)
+            for choice in event.get("choices") or ():
+                delta = (choice.get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+
+
+def stream_chat_completion(payload: dict, api_key: str, base_url: str | None = None, timeout: float = 60):
+    """Open a streaming chat completion and return an iterator of content deltas.
+
+    The connection is opened (and HTTP errors raised) before returning, so the
+    call can be wrapped in `call_with_retry`; the deltas themselves are read
+    lazily as the model produces them.
+    """
+    request = _request({**payload, "stream": True}, api_key, base_url)
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        raise _http_error(e) from e
+    metrics.inc("llm_requests_total", status="ok")
+    return _iter_sse(response)
+
+
+def call_with_retry(fn, max_retries: int = 4, backoff: float = 0.5, max_backoff: float = 8.0):
+    """Run `fn()`, retrying 429/5xx and connection errors with jittered exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except LLMHTTPError as e:
+            if e.status not in RETRY_STATUSES or attempt == max_retries:
+                raise
+            delay = e.retry_after if e.retry_after is not None else backoff * (2 ** attempt)
+        except (urllib.error.URLError, TimeoutError, ConnectionError):
+            if attempt == max_retries:
+                raise
+            delay = backoff * (2 ** attempt)
+        time.sleep(min(delay, max_backoff) * (1 + random.random() * 0.1))
+
+
+def run_batch(items: list, worker, max_in_flight: int = MAX_IN_FLIGHT, rate: float = RATE_LIMIT,
+              progress=None) -> list:
+    """Apply `worker` to every item concurrently and return results in input order.
+
+    At most `max_in_flight` calls run at once and call starts are throttled by a
+    token bucket of `rate` requests/second. `worker` should handle its own errors.
+    `progress(done, total)` runs in the caller's thread after each call; if it
+    raises, calls not started yet are dropped and the exception propagates.
+    """
+    items = list(items)
+    if not items:
+        return []
+    limiter = TokenBucket(rate, capacity=max_in_flight)
+
+    def task(item):
+        limiter.acquire()
+        return worker(item)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(items))))
+    try:
+        futures = [pool.submit(task, item) for item in items]
+        if progress is not None:
+            for done, _ in enumerate(as_completed(futures), 1):
+                progress(done, len(futures))
+        return [f.result() for f in futures]
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def analyze_packed_misses(clauses: list[str], build_payload, offline, parse_failed: dict, on_error,
+                          max_in_flight: int = MAX_IN_FLIGHT, rate: float = RATE_LIMIT,
+                          progress=None) -> list[tuple[dict, bool]]:
+    """`analyze_misses` for core.llm_cache.cached_batch: packed requests (core.packing), one per batch.
+
+    `build_payload(items)` makes the request body for a list of (id, text)
+    items. Without GROQ_API_KEY every clause gets `offline(clause)`, uncached.
+    `progress` is passed on to run_batch.
+    """
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        return [(offline(c), False) for c in clauses]
+    from core.packing import analyze_packed
+
+    def send(items: list[tuple[str, str]]) -> str:
+        payload = build_payload(items)
+        reply = call_with_retry(lambda: chat_completion(payload, api_key))
+        return reply["choices"][0]["message"]["content"]
+
+    return analyze_packed(clauses, send, parse_failed, on_error, max_in_flight=max_in_flight, rate=rate,
+                          progress=progress)
+
+
+def iter_packed_misses(clauses: list[str], build_payload, offline, parse_failed: dict, on_error,
+                       max_in_flight: int = MAX_IN_FLIGHT, rate: float = RATE_LIMIT):
+    """Streaming analyze_packed_misses, the `iter_misses` for core.llm_cache.iter_cached."""
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        return ((j, offline(c), False) for j, c in enumerate(clauses))
+    from core.packing import iter_packed
+
+    def send_stream(items: list[tuple[str, str]]):
+        return call_with_retry(lambda: stream_chat_completion(build_payload(items), api_key))
+
+    return iter_packed(clauses, send_stream, parse_failed, on_error, max_in_flight=max_in_flight, rate=rate)
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from core import metrics
+
+CACHE_FILE = os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite")
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+NEAR_DUP = os.getenv("NEAR_DUP_ENABLED", "0").lower() in ("1", "true", "yes")  # Opt-in; see core.near_dup
+
+
+def normalize_clause(text: str) -> str:
+    """Collapse whitespace and case so trivially different copies share a key."""
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def cache_key(clause_text: str, lang: str, model: str, prompt_version: str) -> str:
+    """Content address: sha256 over normalized text, language, model and prompt version."""
+    h = hashlib.sha256()
+    for part in (normalize_clause(clause_text), lang, model, prompt_version):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """SQLite-backed LRU cache of LLM clause analyses."""
+
+    def __init__(self, path: str = CACHE_FILE, max_entries: int = MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_lru ON analyses(last_used)")
+
+    def get(self, key: str) -> dict | None:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: list[str]) -> list:
+        """Look up several keys at once; misses come back as None."""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique), 500):
+                chunk = unique[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM analyses WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((k, json.loads(v)) for k, v in rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE analyses SET last_used = ? WHERE key = ?",
+                                       [(now, k) for k in found])
+            results = [found.get(k) for k in keys]
+            hit_count = sum(1 for r in results if r is not None)
+            self.hits += hit_count
+            self.misses += len(keys) - hit_count
+        return results
+
+    def put(self, key: str, value: dict):
+        self.put_many([(key, value)])
+
+    def put_many(self, items: list[tuple[str, dict]]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO analyses (key, value, last_used) VALUES (?, ?, ?)",
+                [(k, json.dumps(v, ensure_ascii=False), now) for k, v in items],
+            )
+            self._evict()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM analyses WHERE key IN "
+                "(SELECT key FROM analyses ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "entries": size,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM analyses")
+            self.hits = self.misses = 0
+
+
+# Lazy shared instance
+_cache = None
+_cache_lock = threading.Lock()
+def get_cache() -> AnalysisCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalysisCache()
+    return _cache
+
+
+def _lookup(cache, clauses: list[str], lang: str, model: str, prompt_version: str):
+    """Cached results (None for misses) and the miss indices grouped by key."""
+    keys = [cache_key(c, lang, model, prompt_version) for c in clauses]
+    results = cache.get_many(keys)
+    if metrics.enabled():
+        hits = sum(r is not None for r in results)
+        metrics.inc("llm_cache_hits_total", hits, model=model)
+        metrics.inc("llm_cache_misses_total", len(results) - hits, model=model)
+
+    # Identical clauses within one batch are only sent once
+    pending = {}
+    for i, r in enumerate(results):
+        if r is None:
+            pending.setdefault(keys[i], []).append(i)
+
+    # Then near-duplicates of clauses analyzed before (renumbered, renamed, reworded slightly)
+    if pending and NEAR_DUP:
+        from core.near_dup import NearDupIndex, get_index
+        scope = NearDupIndex.scope(lang, model, prompt_version)
+        miss_keys = list(pending)
+        for key, found in zip(miss_keys, get_index().lookup_many([clauses[pending[k][0]] for k in miss_keys], scope)):
+            if found is not None:
+                for i in pending.pop(key):
+                    results[i] = dict(found)
+    return results, pending
+
+
+def _index_fresh(items: list[tuple[str, dict]], lang: str, model: str, prompt_version: str):
+    """Add newly analyzed (clause, result) pairs to the near-duplicate index."""
+    if items and NEAR_DUP:
+        from core.near_dup import NearDupIndex, get_index
+        get_index().add_many(items, NearDupIndex.scope(lang, model, prompt_version))
+
+
+def cached_batch(clauses: list[str], lang: str, model: str, prompt_version: str, analyze_misses) -> list[dict]:
+    """Serve clauses from the cache and send only misses to `analyze_misses`.
+
+    `analyze_misses(clauses)` returns one `(result, cacheable)` pair per clause;
+    only cacheable results are stored, so API errors are retried next time.
+    """
+    cache = get_cache()
+    results, pending = _lookup(cache, clauses, lang, model, prompt_version)
+    if not pending:
+        return results
+
+    miss_keys = list(pending)
+    fresh = analyze_misses([clauses[pending[k][0]] for k in miss_keys])
+    to_store, to_index = [], []
+    for key, (result, cacheable) in zip(miss_keys, fresh):
+        for i in pending[key]:
+            results[i] = dict(result)
+        if cacheable:
+            to_store.append((key, result))
+            to_index.append((clauses[pending[key][0]], result))
+    cache.put_many(to_store)
+    _index_fresh(to_index, lang, model, prompt_version)
+    return results
+
+
+def iter_cached(clauses: list[str], lang: str, model: str, prompt_version: str, iter_misses):
+    """Streaming cached_batch: yields (index, result) as soon as each one is known.
+
+    Hits come first; `iter_misses(clauses)` must yield `(miss_index, result,
+    cacheable)` in any order, and each cacheable result is stored as it arrives.
+    """
+    cache = get_cache()
+    results, pending = _lookup(cache, clauses, lang, model, prompt_version)
+    for i, r in enumerate(results):
+        if r is not None:
+            yield i, r
+    if not pending:
+        return
+    miss_keys = list(pending)
+    for j, result, cacheable in iter_misses([clauses[pending[k][0]] for k in miss_keys]):
+        if cacheable:
+            cache.put_many([(miss_keys[j], result)])
+            _index_fresh([(clauses[pending[miss_keys[j]][0]], result)], lang, model, prompt_version)
+        for i in pending[miss_keys[j]]:
+            yield i, dict(result)
@@ -1,71 +1,83 @@
-import os
-import json
-import streamlit as st
-from groq import Groq
-
-def get_groq_client():
-    """Safe Groq client initialization."""
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        st.error("❌ **GROQ_API_KEY not found**. Add to Streamlit Secrets.")
-        st.stop()
-    
-    try:
-        return Groq(api_key=api_key)
-    except Exception as e:
-        st.error(f"❌ Groq init failed: {e}")
-        st.stop()
-
-# Lazy init (only when called)
-_client = None
-def get_client():
-    global _client
-    if _client is None:
-        _client = get_groq_client()
-    return _client
-
-def get_prompt(clause_text: str, lang: str) -> str:
-    """Bilingual IP analysis prompt."""
+from core import metrics
+from core.llm_batch import MAX_IN_FLIGHT, RATE_LIMIT, analyze_packed_misses, iter_packed_misses
+from core.llm_cache import cached_batch, iter_cached
+from core.packing import REPLY_TOKENS_PER_ITEM, format_items
+
+MODEL = "openai/gpt-oss-120b"
+PROMPT_VERSION = "ip-v3"  # Bump when get_batch_prompt changes to invalidate cached analyses
+SYSTEM_PROMPT = "ONLY valid JSON. No markdown/text."
+PARSE_FAILED = {"ownership": "unclear", "exclusivity": "unclear", "favor": "neutral",
+                "risk_reason": "JSON parse failed", "suggested_fix": "Manual review"}
+
+def get_batch_prompt(items: list[tuple[str, str]], lang: str) -> str:
+    """Bilingual prompt for several clauses (or clause chunks) in one request."""
     if lang == "hi":
-        return f"""इस IP क्लॉज का विश्लेषण करें। केवल JSON दें:
+        return f"""नीचे दिए गए प्रत्येक IP क्लॉज का विश्लेषण करें। केवल JSON array दें, हर क्लॉज के लिए एक object:
 
-{{"ownership": "assigned|licensed|retained|unclear", 
-  "exclusivity": "exclusive|non-exclusive|unclear", 
+[{{"id": "c0", "ownership": "assigned|licensed|retained|unclear",
+  "exclusivity": "exclusive|non-exclusive|unclear",
   "favor": "one-sided|balanced|neutral",
   "risk_reason": "संक्षिप्त कारण",
-  "suggested_fix": "बेहतर शब्दावली"}}
+  "suggested_fix": "बेहतर शब्दावली"}}]
 
-क्लॉज: {clause_text[:1000]}"""
-    return f"""Analyze IP clause. Return ONLY JSON:
+क्लॉज:
+{format_items(items)}"""
+    return f"""Analyze each IP clause below. Return ONLY a JSON array with one object per clause:
 
-{{"ownership": "assigned|licensed|retained|unclear", 
-  "exclusivity": "exclusive|non-exclusive|unclear", 
+[{{"id": "c0", "ownership": "assigned|licensed|retained|unclear",
+  "exclusivity": "exclusive|non-exclusive|unclear",
   "favor": "one-sided|balanced|neutral",
-  "risk_reason": "Brief explanation", 
-  "suggested_fix": "Safer wording"}}
+  "risk_reason": "Brief explanation",
+  "suggested_fix": "Safer wording"}}]
+
+Clauses:
+{format_items(items)}"""
 
-Clause: {clause_text[:1000]}"""
+def _api_error(e) -> dict:
+    return {"ownership": "error", "exclusivity": "error", "favor": "error",
+            "risk_reason": f"API error: {str(e)[:100]}", "suggested_fix": "Check API key"}
+
+def _offline(clause_text: str) -> dict:
+    return _api_error("GROQ_API_KEY not found")
 
 def analyze_clause_with_llm(clause_text: str, lang: str) -> dict:
-    """Analyze with error handling."""
-    try:
-        client = get_client()
-        response = client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=[
-                {"role": "system", "content": "ONLY valid JSON. No markdown/text."},
-                {"role": "user", "content": get_prompt(clause_text, lang)}
-            ],
-            temperature=0.1,
-            max_tokens=300
-        )
-        
-        raw = response.choices[0].message.content.strip()
-        return json.loads(raw)
-        
-    except json.JSONDecodeError:
-        return {"ownership": "unclear", "exclusivity": "unclear", "favor": "neutral", 
-                "risk_reason": "JSON parse failed", "suggested_fix": "Manual review"}
-    except Exception as e:
-        return {"ownership": "error", "exclusivity": "error", "favor": "error",
-                "risk_reason": f"API error: {str(e)[:100]}", "suggested_fix": "Check API key"}
+    """Analyze with error handling; long clauses are chunked, not truncated, as in the batch path."""
+    return analyze_clauses_with_llm([clause_text], lang)[0]
+
+def _batch_payload(items: list[tuple[str, str]], lang: str) -> dict:
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": get_batch_prompt(items, lang)}
+        ],
+        "temperature": 0.1,
+        "max_tokens": REPLY_TOKENS_PER_ITEM * len(items) + 100,
+    }
+
+def analyze_clauses_with_llm(clauses: list[str], lang: str,
+                             max_in_flight: int = MAX_IN_FLIGHT, rate: float = RATE_LIMIT,
+                             progress=None) -> list[dict]:
+    """Analyze many clauses in packed, concurrent requests; results come back in input order.
+
+    Several clauses share each request (see core.packing); long clauses are
+    chunked rather than truncated, and only unparseable entries are re-sent.
+    `progress(done, total)` is called after each request and may raise to stop.
+    """
+
+    def analyze_misses(misses: list[str]) -> list[tuple[dict, bool]]:
+        return analyze_packed_misses(misses, lambda items: _batch_payload(items, lang), _offline,
+                                     PARSE_FAILED, _api_error, max_in_flight, rate, progress)
+
+    with metrics.span("llm_batch", model=MODEL):
+        return cached_batch(clauses, lang, MODEL, PROMPT_VERSION, analyze_misses)
+
+def iter_clauses_with_llm(clauses: list[str], lang: str,
+                          max_in_flight: int = MAX_IN_FLIGHT, rate: float = RATE_LIMIT):
+    """Streaming analyze_clauses_with_llm: yields (index, analysis) as each result arrives."""
+
+    def iter_misses(misses: list[str]):
+        return iter_packed_misses(misses, lambda items: _batch_payload(items, lang), _offline,
+                                  PARSE_FAILED, _api_error, max_in_flight, rate)
+
+    return iter_cached(clauses, lang, MODEL, PROMPT_VERSION, iter_misses)
@@ -0,0 +1,151 @@
+"""One compiled scanner for every keyword, entity and clause-type rule.
+
+The scoring rules, entity extraction and clause classification used to lower-
+case each clause and run a dozen `in` checks and `re.findall` passes over it.
+Here all keywords, money amounts and dates are folded into a single
+alternation regex (keywords factored into a prefix trie) that is built once at
+import and run once over each lower-cased clause. Capitalized names, only
+needed by core.entities, are an opt-in second pattern.
+
+Keyword counts keep the old substring semantics ("assign" in "assignment");
+IP and obligation *terms* keep their old whole-word semantics. Keywords that
+contain other keywords ("copyright" ⊃ "right") credit both. Keywords that
+could only overlap without a space between them are not handled.
+"""
+import re
+
+IP_TERMS = ["intellectual property", "ip rights", "ip right", "ownership", "assign", "license",
+            "exclusive", "non-compete", "patent", "copyright", "trademark"]
+OBLIGATION_TERMS = ["shall", "must", "obligation", "required", "liable", "responsible"]
+TRANSFER_TERMS = ["transfer", "assign", "convey"]
+TERMINATION_TERMS = ["terminate", "indemnify", "penalty"]
+PARTY_TERMS = ["buyer", "seller"]
+CLAUSE_TYPES = [  # first match wins, as in classify_clause_type
+    ("obligation", ["shall", "must", "obligation"]),
+    ("right", ["right", "entitled", "may"]),
+    ("prohibition", ["prohibited", "cannot", "restrict"]),
+]
+
+KEYWORDS = sorted(
+    set(IP_TERMS + OBLIGATION_TERMS + TRANSFER_TERMS + TERMINATION_TERMS + PARTY_TERMS
+        + ["exclusive"] + [w for _, words in CLAUSE_TYPES for w in words]),
+    key=len, reverse=True,  # longest first so "ip rights" beats "ip right"
+)
+_IP_SET = set(IP_TERMS)
+_OBLIGATION_SET = set(OBLIGATION_TERMS)
+
+# Keywords found inside a longer matched keyword, e.g. "copyright" -> ["right"]
+_CONTAINED = {k: [o for o in KEYWORDS if o != k and o in k] for k in KEYWORDS}
+
+def _trie_pattern(words: list[str]) -> str:
+    """Factor keywords into a prefix trie ("s(?:hall|eller)") so sre tests each
+    position against one branch per leading letter instead of every keyword."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        if list(node) == [""]:
+            return ""
+        branches = [re.escape(ch).replace(r'\ ', r'\s+') + build(child)
+                    for ch, child in sorted(node.items(), key=lambda kv: -len(kv[0])) if ch]
+        # Longer continuations first; an end-of-word marker makes the group optional
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            body = ("(?:" + body + ")" if len(branches) == 1 and len(body) > 1 else body) + "?"
+        return body
+
+    return build(trie)
+
+
+MONEY_PATTERN = r'[\$₹€]\s*\d{1,3}(?:,\d{3})*(?:\.\d{2})?'
+DATE_PATTERN = r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'
+ORG_RE = re.compile(r'\b[A-Z][a-zA-Z]{2,}(?:\s+[A-Z][a-zA-Z]{2,})?\b')
+
+# Runs over lower-cased text: case-sensitive matching is several times faster in sre
+MATCHER = re.compile(
+    r'(?P<kw>' + _trie_pattern(KEYWORDS) + r')'
+    r'|(?P<money>' + MONEY_PATTERN + r')'
+    r'|(?P<date>' + DATE_PATTERN + r')'
+)
+
+# Per keyword: (keywords it contains, entity label when matched as a whole word)
+_KEYWORD_INFO = {
+    k: (_CONTAINED[k], "IP_TERM" if k in _IP_SET else "OBLIGATION" if k in _OBLIGATION_SET else None)
+    for k in KEYWORDS
+}
+
+
+def _scan_one(clause: str, lower: str, with_orgs: bool) -> dict:
+    counts, ip_terms, obligations, money, dates, spans = {}, [], [], [], [], []
+    info, size = _KEYWORD_INFO, len(lower)
+    for m in MATCHER.finditer(lower):
+        key = m.group("kw")
+        s, e = m.span()
+        if key is not None:
+            if key not in info:
+                key = " ".join(key.split())  # "intellectual \n property"
+            contained, label = info[key]
+            counts[key] = counts.get(key, 0) + 1
+            if contained:
+                for inner in contained:
+                    counts[inner] = counts.get(inner, 0) + 1
+            # Whole-word check inlined: this loop is the hot path
+            if (label and (s == 0 or not lower[s - 1].isalnum())
+                    and (e == size or not lower[e].isalnum())):
+                (ip_terms if label == "IP_TERM" else obligations).append(clause[s:e])
+                spans.append((label, s, e))
+        elif m.lastgroup == "money":
+            money.append(clause[s:e])
+            spans.append(("MONEY", s, e))
+        else:
+            dates.append(clause[s:e])
+            spans.append(("DATE", s, e))
+
+    orgs = []
+    if with_orgs:
+        for m in ORG_RE.finditer(clause):
+            orgs.append(m.group())
+            spans.append(("ORG", m.start(), m.end()))
+        spans.sort(key=lambda span: span[1])
+
+    return {
+        "counts": counts,
+        "ip_terms": ip_terms,
+        "obligations": obligations,
+        "money": money,
+        "dates": dates,
+        "orgs": orgs,
+        "spans": spans,
+        "clause_type": next((label for label, words in CLAUSE_TYPES if any(w in counts for w in words)), "neutral"),
+        "features": {
+            "ip_count": len(ip_terms),
+            "obligation_count": len(obligations),
+            "transfer_count": sum(counts.get(w, 0) for w in TRANSFER_TERMS),
+            "termination_count": sum(counts.get(w, 0) for w in TERMINATION_TERMS),
+            "exclusive_count": counts.get("exclusive", 0),
+            "buyer_seller": "buyer" in counts and "seller" in counts,
+            "money_count": len(money),
+        },
+    }
+
+
+def scan_clause(clause: str, with_orgs: bool = False) -> dict:
+    """Scan one clause in a single regex pass.
+
+    The result holds `counts` (keyword -> substring occurrences), entity lists
+    (`ip_terms`, `obligations`, `money`, `dates`, and `orgs` when `with_orgs`),
+    `spans` as (label, start, end) offsets, `clause_type` and `features`.
+    """
+    lower = clause.lower()
+    if len(lower) != len(clause):  # Rare Unicode case changes length; keep offsets exact
+        lower = "".join(c if len(c.lower()) != 1 else c.lower() for c in clause)
+    return _scan_one(clause, lower, with_orgs)
+
+
+def scan_clauses(clauses: list[str], with_orgs: bool = False) -> list[dict]:
+    """Batch entry point: the matcher is compiled once and reused for every clause."""
+    return [scan_clause(c, with_orgs) for c in clauses]
@@ -0,0 +1,204 @@
+"""Lightweight per-stage metrics: timing spans, counters and latency histograms.
+
+Off by default. When disabled every call is one global flag check and `span()`
+hands back a shared no-op context manager, so instrumented code pays next to
+nothing. Enable with METRICS_ENABLED=1 (or `enable()`); METRICS_PORT starts a
+small HTTP endpoint serving Prometheus text on /metrics and JSON on
+/metrics.json. The app shows the same data in an optional sidebar panel.
+
+    with metrics.span("extract", format="pdf"):
+        ...
+    metrics.inc("bytes_processed_total", len(data), stage="extract")
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "contract_"
+# Upper bounds in seconds; the last bucket (+Inf) is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_enabled = os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> float
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_server = None
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels):
+    """Add `value` to a counter (e.g. bytes, clauses, cache hits, tokens)."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels):
+    """Record one sample into a latency histogram."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    index = bisect_left(LATENCY_BUCKETS, value)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        hist[index] += 1
+        hist[-1] += value
+
+
+class _Span:
+    __slots__ = ("labels", "start")
+
+    def __init__(self, labels: dict):
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe("stage_seconds", time.perf_counter() - self.start, **self.labels)
+        if exc_type is not None:
+            inc("stage_errors_total", **self.labels)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(stage: str, **labels):
+    """Time a block into the `stage_seconds` histogram; errors are counted too."""
+    if not _enabled:
+        return _NOOP
+    return _Span({"stage": stage, **labels})
+
+
+def timed(stage: str, **labels):
+    """Decorator form of `span()`."""
+    def decorate(fn):
+        def wrapper(*args, **kwargs):
+            with span(stage, **labels):
+                return fn(*args, **kwargs)
+        wrapper.__name__, wrapper.__doc__, wrapper.__wrapped__ = fn.__name__, fn.__doc__, fn
+        return wrapper
+    return decorate
+
+
+def snapshot() -> dict:
+    """Plain-dict copy of every metric, as served on /metrics.json."""
+    with _lock:
+        counters = list(_counters.items())
+        histograms = [(key, list(hist)) for key, hist in _histograms.items()]
+    out = {"enabled": _enabled, "counters": [], "histograms": []}
+    for (name, labels), value in sorted(counters):
+        out["counters"].append({"name": name, "labels": dict(labels), "value": value})
+    for (name, labels), hist in sorted(histograms):
+        count = sum(hist[:-1])
+        out["histograms"].append({
+            "name": name, "labels": dict(labels), "count": count, "sum": hist[-1],
+            "mean": hist[-1] / count if count else 0,
+            "buckets": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"], hist[:-1])),
+        })
+    return out
+
+
+def _labels(labels: dict, **extra) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in items.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(items, escaped)) + "}"
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    data = snapshot()
+    lines, typed = [], set()
+    for c in data["counters"]:
+        name = PREFIX + c["name"]
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} counter")
+        lines.append(f"{name}{_labels(c['labels'])} {c['value']:g}")
+    for h in data["histograms"]:
+        name = PREFIX + h["name"]
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        cumulative = 0
+        for bound, count in h["buckets"].items():
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(h['labels'], le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(h['labels'])} {h['sum']:g}")
+        lines.append(f"{name}_count{_labels(h['labels'])} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") == "/metrics":
+            body, ctype = render_prometheus().encode(), "text/plain; version=0.0.4"
+        elif self.path.rstrip("/") == "/metrics.json":
+            body, ctype = json.dumps(snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # Keep scrapes out of the app log
+        pass
+
+
+def serve(port: int | None = None, host: str = "127.0.0.1"):
+    """Start the metrics endpoint in a daemon thread (once per process).
+
+    Without `port`, METRICS_PORT is used; if that is unset nothing is started.
+    Returns the server, or None.
+    """
+    global _server
+    port = port if port is not None else int(os.getenv("METRICS_PORT", "0") or 0)
+    if not port:
+        return None
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
@@ -0,0 +1,267 @@
+"""Near-duplicate clause index: reuse LLM analyses of clauses seen before.
+
+Exact-hash caching (core.llm_cache) misses template clauses that differ only
+in numbering, party names, amounts or whitespace. Each analyzed clause is
+reduced to a MinHash signature over word 3-shingles (section header
+stripped, digits folded to "0", punctuation dropped) and bucketed with LSH banding, so a lookup only compares
+against the handful of stored clauses sharing a band. A candidate whose
+estimated Jaccard similarity reaches NEAR_DUP_THRESHOLD supplies its stored
+analysis instead of a new LLM call.
+
+Similar wording is not the same meaning: "shall be assigned" and "shall not
+be assigned" share most shingles. A candidate is therefore only reused when
+its meaning key matches too, i.e. the same negation and modal words ("not",
+"without", "shall", "may", ...), the same matcher keyword counts and the same
+rule score. Numbers, names and whitespace stay interchangeable.
+
+The index lives in SQLite (NEAR_DUP_PATH), survives restarts and keeps at most
+NEAR_DUP_MAX_ENTRIES signatures, evicting the least recently used. Reuse is
+off unless NEAR_DUP_ENABLED=1 (core.llm_cache).
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter
+
+from core import metrics
+from core.clause_splitter import HEADER_RE
+from core.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+INDEX_FILE = os.getenv("NEAR_DUP_PATH", "data/near_dup.sqlite")
+MAX_ENTRIES = int(os.getenv("NEAR_DUP_MAX_ENTRIES", "20000"))
+THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.85"))  # Estimated Jaccard; above 1 disables reuse
+MAX_CANDIDATES = 32
+SHINGLE = 3
+BANDS, ROWS = 16, 4  # 64 hash functions; LSH candidate curve is centred near 0.5
+NUM_PERM = BANDS * ROWS
+_MERSENNE = (1 << 61) - 1
+_SEED = 20240601  # Fixed: stored signatures must stay comparable across processes
+
+# Words that flip or weaken an obligation; a reused analysis must agree on every one
+GUARD_WORDS = frozenset({
+    "not", "no", "never", "nor", "without", "cannot", "neither", "except", "unless",
+    "shall", "may", "must", "will", "should", "might", "can",
+    "नहीं", "न", "मत", "बिना", "सिवाय", "सकता", "सकती", "सकते", "चाहिए", "होगा", "होगी", "करेगा", "करेगी",
+})
+
+_PUNCT_RE = re.compile(r"[^\w\s\u0900-\u0963\u0966-\u097F]+")  # Keeps Devanagari signs, drops danda
+_DIGIT_RE = re.compile(r"\d+")
+
+
+def shingles(text: str, k: int = SHINGLE) -> list[str]:
+    """Word k-shingles of the normalized clause (header, numbers and punctuation ignored)."""
+    header = HEADER_RE.match(text)
+    if header:
+        text = text[header.end():]
+    words = _DIGIT_RE.sub("0", _PUNCT_RE.sub(" ", text.casefold())).split()
+    if len(words) <= k:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+
+
+_perms = None
+def meaning_key(text: str) -> str:
+    """Guard words, matcher keyword counts and rule score of a clause, as a comparable string."""
+    from core.matcher import scan_clause
+    from core.risk_model import get_model
+    scan = scan_clause(text)
+    guards = Counter(w for w in _PUNCT_RE.sub(" ", text.casefold()).split() if w in GUARD_WORDS)
+    score = get_model().score([scan["features"]])[0][1]
+    return json.dumps([sorted(guards.items()), sorted(scan["counts"].items()), score], ensure_ascii=False)
+
+
+def _permutations():
+    global _perms
+    if _perms is None:
+        rng = np.random.RandomState(_SEED)
+        a = rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+        b = rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+        _perms = (a, b)
+    return _perms
+
+
+def signature(text: str):
+    """MinHash signature (uint32[NUM_PERM]) of the clause's shingle set."""
+    a, b = _permutations()
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in set(shingles(text))), dtype=np.uint64)
+    # a, x < 2**32 so a*x + b fits in uint64 before the Mersenne reduction
+    values = (hashes[:, None] * a + b) % _MERSENNE
+    return (values.min(axis=0) & 0xFFFFFFFF).astype(np.uint32)
+
+
+def similarity(sig_a, sig_b) -> float:
+    """Estimated Jaccard similarity: share of agreeing signature slots."""
+    return float((sig_a == sig_b).mean())
+
+
+def band_keys(sig) -> list[int]:
+    """One LSH bucket per band (crc32 of the band's rows, salted with the band number)."""
+    rows = sig.reshape(BANDS, ROWS)
+    return [zlib.crc32(rows[band].tobytes(), band) for band in range(BANDS)]
+
+
+class NearDupIndex:
+    """MinHash/LSH index of analyzed clauses: SQLite for persistence, buckets in memory.
+
+    Signatures are loaded once per process and the LSH buckets rebuilt from
+    them, so lookups never touch SQLite except to bump `last_used`. Entries
+    added by other processes become visible after a restart.
+    """
+
+    def __init__(self, path: str = INDEX_FILE, max_entries: int = MAX_ENTRIES, threshold: float = THRESHOLD):
+        self.path = path
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries = {}  # id -> (scope, signature, value JSON)
+        self._buckets = {}  # (scope, band, bucket) -> [ids]
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS clauses ("
+            " id INTEGER PRIMARY KEY, scope TEXT NOT NULL, signature BLOB NOT NULL,"
+            " value TEXT NOT NULL, last_used REAL NOT NULL, meaning TEXT NOT NULL DEFAULT '')"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(clauses)")}
+        if "meaning" not in columns:  # Older index: its rows never match and age out
+            self._conn.execute("ALTER TABLE clauses ADD COLUMN meaning TEXT NOT NULL DEFAULT ''")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS clauses_lru ON clauses(last_used)")
+        self._loaded = False
+
+    @staticmethod
+    def scope(lang: str, model: str, prompt_version: str) -> str:
+        """Analyses are only reused within the same language, model and prompt."""
+        return f"{lang}|{model}|{prompt_version}"
+
+    def _load(self):
+        if self._loaded:
+            return
+        for row_id, scope, blob, value, meaning in self._conn.execute(
+                "SELECT id, scope, signature, value, meaning FROM clauses"):
+            self._remember(row_id, scope, np.frombuffer(blob, dtype=np.uint32), value, meaning)
+        self._loaded = True
+
+    def _remember(self, row_id: int, scope: str, sig, value: str, meaning: str):
+        self._entries[row_id] = (scope, sig, value, meaning)
+        for band, bucket in enumerate(band_keys(sig)):
+            self._buckets.setdefault((scope, band, bucket), []).append(row_id)
+
+    def _forget(self, row_ids: list[int]):
+        for row_id in row_ids:
+            scope, sig, _, _ = self._entries.pop(row_id)
+            for band, bucket in enumerate(band_keys(sig)):
+                ids = self._buckets.get((scope, band, bucket))
+                if ids is not None:
+                    ids.remove(row_id)
+                    if not ids:
+                        del self._buckets[(scope, band, bucket)]
+
+    def _best_match(self, sig, scope: str, meaning: str):
+        """(similarity, id) of the best stored clause with this meaning key at or above the threshold, or None.
+
+        Only the MAX_CANDIDATES ids sharing the most bands are verified, which
+        bounds the cost when many stored clauses come from the same template.
+        """
+        hits = [ids for band, bucket in enumerate(band_keys(sig))
+                if (ids := self._buckets.get((scope, band, bucket)))]
+        if not hits:
+            return None
+        ids, counts = np.unique(np.concatenate(hits), return_counts=True)
+        same = np.array([self._entries[int(i)][3] == meaning for i in ids], dtype=bool)
+        ids, counts = ids[same], counts[same]
+        if not len(ids):
+            return None
+        if len(ids) > MAX_CANDIDATES:
+            ids = ids[np.argsort(-counts, kind="stable")[:MAX_CANDIDATES]]
+        stored = np.stack([self._entries[int(i)][1] for i in ids])
+        scores = (stored == sig).mean(axis=1)
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            return None
+        return float(scores[best]), int(ids[best])
+
+    def lookup(self, text: str, scope: str) -> tuple[dict, float] | None:
+        """Stored analysis of the most similar clause at or above the threshold, with its similarity."""
+        if self.threshold > 1:
+            return None
+        sig, meaning = signature(text), meaning_key(text)
+        with self._lock:
+            self._load()
+            best = self._best_match(sig, scope, meaning)
+            if best is None:
+                return None
+            score, row_id = best
+            self._conn.execute("UPDATE clauses SET last_used = ? WHERE id = ?", (time.time(), row_id))
+            return json.loads(self._entries[row_id][2]), score
+
+    def lookup_many(self, texts: list[str], scope: str) -> list[dict | None]:
+        found = []
+        for text in texts:
+            match = self.lookup(text, scope)
+            found.append(match[0] if match else None)
+        hits = sum(r is not None for r in found)
+        metrics.inc("near_dup_hits_total", hits)
+        metrics.inc("near_dup_misses_total", len(found) - hits)
+        return found
+
+    def add_many(self, items: list[tuple[str, dict]], scope: str):
+        """Index (clause text, analysis) pairs; clauses already represented are skipped."""
+        if not items or self.threshold > 1:
+            return
+        rows = [(signature(text), meaning_key(text), json.dumps(value, ensure_ascii=False))
+                for text, value in items]
+        now = time.time()
+        with self._lock:
+            self._load()
+            for sig, meaning, value in rows:
+                if self._best_match(sig, scope, meaning) is not None:
+                    continue  # Keeps template-heavy indexes small
+                cur = self._conn.execute(
+                    "INSERT INTO clauses (scope, signature, value, last_used, meaning) VALUES (?, ?, ?, ?, ?)",
+                    (scope, sig.tobytes(), value, now, meaning))
+                self._remember(cur.lastrowid, scope, sig, value, meaning)
+            self._evict()
+
+    def _evict(self):
+        # Count the table, not this process's view: batch and job workers share the file
+        count = self._conn.execute("SELECT COUNT(*) FROM clauses").fetchone()[0]
+        if count > self.max_entries:
+            # Evict an extra 10% so eviction does not run on every add once full
+            self._conn.execute(
+                "DELETE FROM clauses WHERE id IN (SELECT id FROM clauses ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries + self.max_entries // 10,))
+        if count > self.max_entries or len(self._entries) > self.max_entries:
+            # Drop what is gone from the table, including rows other processes evicted
+            live = {row[0] for row in self._conn.execute("SELECT id FROM clauses")}
+            self._forget([i for i in self._entries if i not in live])
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM clauses").fetchone()[0]
+        return {"entries": size, "max_entries": self.max_entries, "threshold": self.threshold}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM clauses")
+            self._entries.clear()
+            self._buckets.clear()
+
+
+# Lazy shared instance
+_index = None
+_index_lock = threading.Lock()
+def get_index() -> NearDupIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDupIndex()
+    return _index
@@ -0,0 +1,303 @@
+"""Token-aware packing of several clauses into one LLM request.
+
+Clauses are numbered, long ones are split at sentence ends into chunks
+("c3.0", "c3.1", …) instead of being cut off, and the pieces are packed
+greedily into requests under a prompt token budget. The model answers with a
+JSON array of objects keyed by "id"; entries that are missing or invalid are
+re-sent on their own in the next round, and chunk results are merged back into
+one analysis per clause.
+
+`iter_packed` is the streaming variant: replies are read as server-sent deltas
+and every array entry is released the moment its closing brace arrives.
+
+The engines (core.llm_engine, core.risk_engine) supply the prompt, transport
+and error results; this module only deals with ids, budgets and replies.
+"""
+import json
+import os
+import queue
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from core import metrics
+from core.clause_splitter import _pack_sentences
+from core.llm_batch import MAX_IN_FLIGHT, RATE_LIMIT, TokenBucket, run_batch
+
+PACK_TOKENS = int(os.getenv("LLM_PACK_TOKENS", "2500"))  # Clause tokens per request
+CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", "800"))  # Longer clauses are chunked
+MAX_ITEMS = int(os.getenv("LLM_PACK_MAX_ITEMS", "8"))
+REPLY_TOKENS_PER_ITEM = 120
+RESEND_ROUNDS = 2
+
+FIELDS = {
+    "ownership": ("assigned", "licensed", "retained", "unclear"),
+    "exclusivity": ("exclusive", "non-exclusive", "unclear"),
+    "favor": ("one-sided", "balanced", "neutral"),
+    "risk_reason": None,
+    "suggested_fix": None,
+}
+_ARRAY_RE = re.compile(r"\[.*\]", re.DOTALL)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap upper-leaning estimate: ~4 ASCII chars per token, ~1 token per other char.
+
+    Devanagari is 3 UTF-8 bytes per character, so the byte/char difference
+    counts non-ASCII characters without a Python loop.
+    """
+    other = (len(text.encode("utf-8")) - len(text)) // 2
+    return (len(text) - other) // 4 + other + 1
+
+
+def chunk_clause(text: str, max_tokens: int = CHUNK_TOKENS) -> list[str]:
+    """Sentence-aligned pieces of at most ~max_tokens; a single overlong sentence is hard-split."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    chars_per_token = max(1.0, len(text) / estimate_tokens(text))
+    max_chars = max(1, int(max_tokens * chars_per_token))
+    chunks = []
+    for start, end in _pack_sentences(text, 0, len(text), max_chars):
+        for i in range(start, end, max_chars):
+            piece = text[i:min(i + max_chars, end)].strip()
+            if piece:
+                chunks.append(piece)
+    return chunks
+
+
+def make_items(clauses: list[str], chunk_tokens: int = CHUNK_TOKENS) -> tuple[list[tuple[str, str]], list[list[str]]]:
+    """(id, text) items for every clause/chunk, plus the item ids belonging to each clause."""
+    items, owners = [], []
+    for i, clause in enumerate(clauses):
+        chunks = chunk_clause(clause, chunk_tokens)
+        ids = [f"c{i}"] if len(chunks) == 1 else [f"c{i}.{j}" for j in range(len(chunks))]
+        items.extend(zip(ids, chunks))
+        owners.append(ids)
+    return items, owners
+
+
+def pack(items: list[tuple[str, str]], budget: int = PACK_TOKENS, max_items: int = MAX_ITEMS) -> list[list[tuple[str, str]]]:
+    """Greedy in-order packing: a new request starts when the budget or item cap is hit."""
+    batches, current, used = [], [], 0
+    for item in items:
+        cost = estimate_tokens(item[1])
+        if current and (used + cost > budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def format_items(items: list[tuple[str, str]]) -> str:
+    """Clause block for a packed prompt: one `[id] text` paragraph per item."""
+    return "\n\n".join(f"[{item_id}] {text}" for item_id, text in items)
+
+
+def valid_analysis(entry) -> bool:
+    if not isinstance(entry, dict):
+        return False
+    for field, allowed in FIELDS.items():
+        value = entry.get(field)
+        if not isinstance(value, str) or (allowed and value.strip().lower() not in allowed):
+            return False
+    return True
+
+
+def parse_reply(content: str, ids: set[str]) -> dict[str, dict]:
+    """Valid analyses by id from a model reply; anything unusable is simply absent."""
+    match = _ARRAY_RE.search(content or "")
+    try:
+        entries = json.loads(match.group() if match else content)
+    except (TypeError, ValueError):
+        return {}
+    if isinstance(entries, dict):  # {"results": [...]} from json_object mode
+        entries = next((v for v in entries.values() if isinstance(v, list)), [entries])
+    return _valid_entries(entries if isinstance(entries, list) else [], ids)
+
+
+def _valid_entries(entries: list, ids: set[str]) -> dict[str, dict]:
+    parsed = {}
+    for entry in entries:
+        item_id = str(entry.get("id", "")).strip("[] ") if isinstance(entry, dict) else ""
+        if item_id in ids and valid_analysis(entry):
+            parsed[item_id] = {field: entry[field].strip() for field in FIELDS}
+    return parsed
+
+
+def _worst(values: list[str], order: tuple) -> str:
+    """Most restrictive label across chunks (order lists labels from worst to mildest)."""
+    return min(values, key=lambda v: order.index(v.lower()) if v.lower() in order else len(order))
+
+
+def merge_chunks(analyses: list[dict]) -> dict:
+    """One analysis for a chunked clause: worst-case labels, de-duplicated reasons/fixes."""
+    if len(analyses) == 1:
+        return analyses[0]
+    merged = {
+        "ownership": _worst([a["ownership"] for a in analyses], ("assigned", "licensed", "retained", "unclear")),
+        "exclusivity": _worst([a["exclusivity"] for a in analyses], ("exclusive", "non-exclusive", "unclear")),
+        "favor": _worst([a["favor"] for a in analyses], ("one-sided", "balanced", "neutral")),
+    }
+    for field in ("risk_reason", "suggested_fix"):
+        merged[field] = " ".join(dict.fromkeys(a[field] for a in analyses if a[field]))
+    return merged
+
+
+def analyze_packed(clauses: list[str], send, parse_failed: dict, on_error,
+                   budget: int = PACK_TOKENS, max_items: int = MAX_ITEMS, rounds: int = RESEND_ROUNDS,
+                   max_in_flight: int = MAX_IN_FLIGHT, rate: float = RATE_LIMIT,
+                   progress=None) -> list[tuple[dict, bool]]:
+    """Analyze `clauses` in packed requests; returns one (result, cacheable) pair per clause.
+
+    `send(items)` performs one request for a list of (id, text) items and returns
+    the reply text; exceptions it raises mark those items with `on_error(e)`.
+    Items whose reply entry is missing or invalid are re-sent, one per request,
+    for up to `rounds` more rounds before falling back to `parse_failed`.
+    `progress(done, total)` is called after each request of a round (run_batch).
+    """
+    items, owners = make_items(clauses)
+    done, errors = {}, {}
+    pending = items
+    for round_no in range(rounds + 1):
+        batches = pack(pending, budget, max_items if round_no == 0 else 1)
+
+        def worker(batch):
+            try:
+                return parse_reply(send(batch), {item_id for item_id, _ in batch}), None
+            except Exception as e:
+                return {}, e
+
+        for batch, (parsed, error) in zip(batches, run_batch(batches, worker, max_in_flight, rate, progress)):
+            done.update(parsed)
+            if error is not None:
+                errors.update((item_id, on_error(error)) for item_id, _ in batch)
+        pending = [item for item in pending if item[0] not in done and item[0] not in errors]
+        metrics.inc("llm_packed_requests_total", len(batches), round=str(round_no))
+        if not pending:
+            break
+        metrics.inc("llm_resent_items_total", len(pending))
+
+    results = []
+    for ids in owners:
+        if all(i in done for i in ids):
+            results.append((merge_chunks([done[i] for i in ids]), True))
+        else:
+            failed = next((errors[i] for i in ids if i in errors), None)
+            results.append((dict(failed if failed is not None else parse_failed), False))
+    return results
+
+
+class ArrayObjectParser:
+    """Incremental parser for a streamed JSON array of flat objects.
+
+    `feed(delta)` returns the objects completed by that delta. Anything outside
+    the objects (code fences, commas, prose) is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, delta: str) -> list[dict]:
+        done = []
+        for ch in delta:
+            if self._depth:
+                self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"' and self._depth:
+                self._in_string = True
+            elif ch == "{":
+                if not self._depth:
+                    self._buffer = ["{"]
+                self._depth += 1
+            elif ch == "}" and self._depth:
+                self._depth -= 1
+                if not self._depth:
+                    try:
+                        done.append(json.loads("".join(self._buffer)))
+                    except ValueError:
+                        pass
+                    self._buffer = []
+        return done
+
+
+def iter_packed(clauses: list[str], send_stream, parse_failed: dict, on_error,
+                budget: int = PACK_TOKENS, max_items: int = MAX_ITEMS, rounds: int = RESEND_ROUNDS,
+                max_in_flight: int = MAX_IN_FLIGHT, rate: float = RATE_LIMIT):
+    """Streaming analyze_packed: yields (clause_index, result, cacheable) in arrival order.
+
+    `send_stream(items)` opens one streaming request and returns an iterator of
+    reply text deltas. Packed requests run on a thread pool; each entry is
+    yielded as soon as its object is complete in the stream (a chunked clause
+    once all its chunks are in). Missing or invalid entries are re-sent alone.
+    """
+    items, owners = make_items(clauses)
+    owner_of = {item_id: i for i, ids in enumerate(owners) for item_id in ids}
+    events = queue.Queue()
+    limiter = TokenBucket(rate, capacity=max_in_flight)
+
+    def request(batch) -> set:
+        """One streamed request; returns the ids answered validly."""
+        ids = {item_id for item_id, _ in batch}
+        answered = set()
+        limiter.acquire()
+        parser = ArrayObjectParser()
+        for delta in send_stream(batch):
+            for entry in parser.feed(delta):
+                for item_id, analysis in _valid_entries([entry], ids - answered).items():
+                    answered.add(item_id)
+                    events.put((item_id, analysis, True))
+        return answered
+
+    def worker(batch):
+        pending = batch
+        try:
+            for round_no in range(rounds + 1):
+                if round_no:
+                    metrics.inc("llm_resent_items_total", len(pending))
+                answered = set()
+                for sub_batch in pack(pending, budget, max_items if round_no == 0 else 1):
+                    answered |= request(sub_batch)
+                pending = [item for item in pending if item[0] not in answered]
+                if not pending:
+                    return
+            for item_id, _ in pending:
+                events.put((item_id, dict(parse_failed), False))
+        except Exception as e:
+            for item_id, _ in pending:
+                events.put((item_id, on_error(e), False))
+
+    batches = pack(items, budget, max_items)
+    metrics.inc("llm_packed_requests_total", len(batches), round="0")
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_in_flight, len(batches))))
+    for batch in batches:
+        pool.submit(worker, batch)
+    pool.shutdown(wait=False)
+
+    received = [dict() for _ in clauses]
+    failed = [None] * len(clauses)
+    remaining = len(clauses)
+    while remaining:
+        item_id, analysis, good = events.get()
+        i = owner_of[item_id]
+        if item_id in received[i]:
+            continue
+        received[i][item_id] = analysis
+        if not good and failed[i] is None:
+            failed[i] = analysis
+        if len(received[i]) == len(owners[i]):
+            remaining -= 1
+            if failed[i] is None:
+                yield i, merge_chunks([received[i][x] for x in owners[i]]), True
+            else:
+                yield i, failed[i], False
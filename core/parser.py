@@ -1,60 +1,237 @@
-import streamlit as st
-import fitz  # PyMuPDF
-import docx
+import multiprocessing
+from array import array
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from xml.etree.ElementTree import iterparse
+from core import metrics
+from core.lazy import lazy_import
 from core.language import get_nlp_pipeline
 
+fitz = lazy_import("fitz")  # PyMuPDF
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+# Below this many pages serial extraction wins; re-measure with benchmarks/bench_pdf_parallel.py
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "48"))
+
+PREPROCESS_BATCH_SIZE = int(os.getenv("PREPROCESS_BATCH_SIZE", "256"))
+PREPROCESS_PROCESSES = int(os.getenv("PREPROCESS_PROCESSES", "1"))
+PREPROCESS_PARALLEL_MIN = 2000  # Texts; smaller batches finish before a pool starts
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY, _W_P, _W_T = _W + "body", _W + "p", _W + "t"
+_W_SPACES = {_W + "tab", _W + "br", _W + "cr"}
+
 def clean_text(text: str) -> str:
     """Clean extracted text."""
     text = text.replace("\n", " ").replace("\t", " ")
     return " ".join(text.split())
 
-def read_pdf(file) -> str:
-    text = ""
-    with fitz.open(stream=file.read(), filetype="pdf") as doc:
-        for page in doc:
-            text += page.get_text()
-    return clean_text(text)
+def _as_file(file):
+    """Accept raw bytes or a file-like object, rewound to the start."""
+    if isinstance(file, (bytes, bytearray)):
+        return BytesIO(file)
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return file
+
+def _open_pdf(file):
+    """Open from a path (PyMuPDF reads it lazily) or a stream without an extra copy."""
+    if isinstance(file, (str, os.PathLike)):
+        return fitz.open(file)
+    file = _as_file(file)
+    if not isinstance(file, BytesIO):
+        file = file.read()
+    return fitz.open(stream=file, filetype="pdf")
+
+def _extract_page_range(job) -> list[str]:
+    """Worker: open the document itself (PyMuPDF objects are not shareable) and read a page range."""
+    path, start, stop = job
+    with fitz.open(path) as doc:
+        return [clean_text(doc[i].get_text()) for i in range(start, stop)]
+
+def _iter_pages_parallel(path: str, page_count: int, workers: int):
+    # ~4 shards per worker keeps workers busy when page costs are uneven
+    step = max(1, -(-page_count // (workers * 4)))
+    jobs = [(path, start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for pages in pool.map(_extract_page_range, jobs):  # map() keeps page order
+            metrics.inc("pages_total", len(pages), format="pdf")
+            yield from (text for text in pages if text)
+
+def _use_parallel(count: int, workers: int, min_count: int) -> bool:
+    # Pool workers (e.g. the batch CLI) are daemonic and may not start their own pool
+    return workers > 1 and count >= min_count and not multiprocessing.current_process().daemon
+
+def iter_pdf_pages(file, workers: int = 1, min_pages: int = PARALLEL_MIN_PAGES):
+    """Yield cleaned text one page at a time, in page order.
+
+    Serially only the current page is held in memory. With `workers` > 1 and at
+    least `min_pages` pages, page ranges are sharded across a process pool; each
+    worker opens the file from disk, so uploads are spooled to a temp file first.
+    """
+    with _open_pdf(file) as doc:
+        page_count = doc.page_count
+        if not _use_parallel(page_count, workers, min_pages):
+            for page in doc:
+                text = clean_text(page.get_text())
+                metrics.inc("pages_total", format="pdf")
+                if text:
+                    yield text
+            return
+
+    if isinstance(file, (str, os.PathLike)):
+        yield from _iter_pages_parallel(os.fspath(file), page_count, workers)
+        return
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        src = _as_file(file)
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(src.getbuffer() if isinstance(src, BytesIO) else src.read())
+        yield from _iter_pages_parallel(path, page_count, workers)
+    finally:
+        os.unlink(path)
+
+def read_pdf(file, workers: int | None = None) -> str:
+    """Full document text; large PDFs are extracted in parallel (default: one worker per CPU)."""
+    return " ".join(iter_pdf_pages(file, workers=workers or os.cpu_count() or 1))
+
+def iter_docx_paragraphs(file):
+    """Yield cleaned paragraph text from a .docx in document order, tables included.
+
+    `word/document.xml` is iterparsed straight from the zip: table cells, text
+    boxes and content controls are just paragraphs nested deeper, and every
+    finished top-level block is cleared from the tree, so memory stays flat.
+    Deleted tracked changes (w:delText) and field codes are not text and are skipped.
+    """
+    source = os.fspath(file) if isinstance(file, (str, os.PathLike)) else _as_file(file)
+    with zipfile.ZipFile(source) as archive, archive.open("word/document.xml") as xml:
+        body = None
+        depth = 0
+        runs = []  # One list of text pieces per open (possibly nested) paragraph
+        for event, elem in iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                depth += 1
+                if tag == _W_P:
+                    runs.append([])
+                elif tag == _W_BODY:
+                    body, body_depth = elem, depth
+                continue
+            depth -= 1
+            if tag == _W_T:
+                if runs:
+                    runs[-1].append(elem.text or "")
+            elif tag in _W_SPACES:
+                if runs:
+                    runs[-1].append(" ")
+            elif tag == _W_P:
+                text = clean_text("".join(runs.pop()))
+                if text:
+                    yield text
+            if body is not None and depth == body_depth:
+                body.clear()  # A top-level paragraph/table/section is done
 
 def read_docx(file) -> str:
-    document = docx.Document(file)
-    text = " ".join([p.text for p in document.paragraphs])
-    return clean_text(text)
+    return " ".join(iter_docx_paragraphs(file))
 
 def read_txt(file) -> str:
-    text = file.read().decode("utf-8", errors="ignore")
+    text = _as_file(file).read().decode("utf-8", errors="ignore")
     return clean_text(text)
 
+def _input_bytes(file) -> int:
+    """Size of a path, bytes or seekable upload, for the bytes-processed counter."""
+    if isinstance(file, (str, os.PathLike)):
+        return os.path.getsize(file)
+    if isinstance(file, (bytes, bytearray)):
+        return len(file)
+    if hasattr(file, "getbuffer"):
+        return file.getbuffer().nbytes
+    try:
+        return os.fstat(file.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        return getattr(file, "size", 0) or 0
+
+def extract_text(filename: str, file) -> str:
+    """Dispatch on extension; raises ValueError for unsupported formats."""
+    name = filename.lower()
+    fmt = os.path.splitext(name)[1].lstrip(".")
+    readers = {"pdf": read_pdf, "docx": read_docx, "txt": read_txt}
+    if fmt not in readers:
+        raise ValueError(f"Unsupported format: {os.path.splitext(name)[1] or name}")
+    with metrics.span("extract", format=fmt):
+        text = readers[fmt](file)
+    if metrics.enabled():
+        metrics.inc("bytes_processed_total", _input_bytes(file), stage="extract", format=fmt)
+        metrics.inc("chars_extracted_total", len(text), format=fmt)
+    return text
+
 def get_input_text(mode: str) -> str:
     """Handle file upload or text input."""
+    import streamlit as st  # UI-only; keeps the readers importable headless
+
     if mode == "Upload File":
         uploaded_file = st.file_uploader(
-            "Upload contract (PDF/DOCX/TXT)", 
+            "Upload contract (PDF/DOCX/TXT)",
             type=["pdf", "docx", "txt"]
         )
         if uploaded_file is None:
             return ""
 
-        filename = uploaded_file.name.lower()
         try:
-            if filename.endswith(".pdf"):
-                return read_pdf(uploaded_file)
-            elif filename.endswith(".docx"):
-                return read_docx(uploaded_file)
-            elif filename.endswith(".txt"):
-                return read_txt(uploaded_file)
-            else:
-                st.error("❌ Unsupported format")
-                return ""
+            return extract_text(uploaded_file.name, uploaded_file)
+        except ValueError:
+            st.error("❌ Unsupported format")
+            return ""
         except Exception as e:
             st.error(f"❌ File error: {e}")
             return ""
     else:
         return st.text_area("Paste contract text:", height=300)
 
-def preprocess_text(text: str, lang: str) -> str:
-    """Simple cleaning (no heavy lemmatization)."""
+def _token_offsets(doc) -> array:
+    """Flat (start, end) character offsets of the kept tokens: no punctuation, 3+ chars."""
+    offsets = array("I")
+    for token in doc:
+        if not token.is_punct and len(token) > 2:
+            offsets.append(token.idx)
+            offsets.append(token.idx + len(token))
+    return offsets
+
+def _preprocess_shard(job) -> list[array]:
+    """Worker: tokenize a slice of texts with the tokenizer only (components disabled)."""
+    texts, lang, batch_size = job
     nlp = get_nlp_pipeline(lang)
-    doc = nlp(text)
-    # Remove stopwords/punctuation only
-    tokens = [token.text for token in doc if not token.is_punct and len(token.text) > 2]
-    return " ".join(tokens)
+    docs = nlp.pipe(texts, batch_size=batch_size, disable=nlp.pipe_names)
+    return [_token_offsets(doc) for doc in docs]
+
+def preprocess_batch(texts: list[str], lang: str, batch_size: int = PREPROCESS_BATCH_SIZE,
+                     n_process: int = PREPROCESS_PROCESSES) -> list[array]:
+    """Token offsets for many texts: one `array('I')` of start/end pairs per text.
+
+    Runs `nlp.pipe` in batches of `batch_size`. With `n_process` > 1 and enough
+    texts, slices are fanned out to a process pool; workers send back the
+    offset arrays rather than Doc objects, which is what makes the fan-out pay.
+    Use `token_texts` to turn offsets back into strings.
+    """
+    texts = list(texts)
+    with metrics.span("preprocess", lang=lang):
+        if not _use_parallel(len(texts), n_process, PREPROCESS_PARALLEL_MIN):
+            return _preprocess_shard((texts, lang, batch_size))
+        step = max(batch_size, -(-len(texts) // (n_process * 4)))
+        jobs = [(texts[i:i + step], lang, batch_size) for i in range(0, len(texts), step)]
+        offsets = []
+        with ProcessPoolExecutor(max_workers=n_process) as pool:
+            for shard in pool.map(_preprocess_shard, jobs):
+                offsets.extend(shard)
+        return offsets
+
+def token_texts(text: str, offsets: array) -> list[str]:
+    return [text[offsets[i]:offsets[i + 1]] for i in range(0, len(offsets), 2)]
+
+def preprocess_text(text: str, lang: str) -> str:
+    """Simple cleaning (no heavy lemmatization): punctuation and short tokens dropped."""
+    return " ".join(token_texts(text, preprocess_batch([text], lang)[0]))
@@ -0,0 +1,353 @@
+"""Headless contract analysis: extract → split → entities → score → (optional) LLM → report.
+
+Nothing here imports Streamlit, so the same pipeline backs `app.py`, the batch
+CLI (`python -m core.batch`) and any other caller.
+"""
+import itertools
+import os
+import queue
+import threading
+
+from core import metrics
+from core.clause_splitter import iter_clause_spans, segment
+from core.language import detect_language, detect_languages
+from core.parser import extract_text, iter_docx_paragraphs, iter_pdf_pages
+from core.risk_model import get_model
+from core.scoring import analyze_clauses, explain_risk, suggest_fix
+
+MIN_TEXT_CHARS = 200
+STREAM_CHUNK_CHARS = 16_000  # DOCX paragraphs are grouped to about a page before splitting
+RECORD_BATCH = 1024  # Clauses scored per batch when filling a ResultStore
+
+
+class PipelineError(ValueError):
+    """Input cannot be analyzed (too short, no clauses, unreadable)."""
+
+
+def score_clauses(clauses: list[str], spans: list[tuple[int, int]] | None = None) -> list[dict]:
+    """Entities, rule-based risk and explanation for each clause, from one scan apiece.
+
+    `spans` are the clauses' (start, end) offsets in the document; without
+    them "start" and "end" are None.
+    """
+    spans = spans or [(None, None)] * len(clauses)
+    results = []
+    for clause, (start, end), lang, scored in zip(clauses, spans, detect_languages(clauses),
+                                                  analyze_clauses(clauses)):
+        results.append({
+            "clause": clause,
+            "start": start,
+            "end": end,
+            "language": lang,
+            **scored,
+            "explanation": explain_risk(scored["entities"]),
+            "suggested_fix": suggest_fix(scored["risk"]),
+        })
+    return results
+
+
+def score_clause(clause: str) -> dict:
+    return score_clauses([clause])[0]
+
+
+def score_records(text: str, spans: list[tuple[int, int]], store=None):
+    """score_clauses into a compact core.records.ResultStore of spans of `text`.
+
+    Clause strings are only copied out a batch at a time, for scanning.
+    """
+    from core.records import ResultStore
+    store = ResultStore(text) if store is None else store
+    for k in range(0, len(spans), RECORD_BATCH):
+        batch = spans[k:k + RECORD_BATCH]
+        clauses = [text[s:e] for s, e in batch]
+        for (s, e), lang, scored in zip(batch, detect_languages(clauses), analyze_clauses(clauses)):
+            store.add(s, e, scored, lang)
+    return store
+
+
+def stream_records(clause_spans):
+    """Score streamed (clause, start, end) in batches, copying each clause into one ResultStore buffer."""
+    from core.records import ResultStore
+    store = ResultStore()
+    for batch in iter(lambda: list(itertools.islice(clause_spans, RECORD_BATCH)), []):
+        clauses = [clause for clause, _, _ in batch]
+        for (clause, start, _), lang, scored in zip(batch, detect_languages(clauses), analyze_clauses(clauses)):
+            store.append(clause, scored, lang, start)
+    return store
+
+
+def build_report(results: list[dict], lang: str) -> dict:
+    """Summary block shown under the clause cards and written by the batch CLI."""
+    high = get_model().high_level
+    return {
+        "language": lang,
+        "clauses": results,
+        "summary": {
+            "composite_risk": sum(r["score"] for r in results) / len(results) if results else 0,
+            "clauses": len(results),
+            "high_risk": sum(1 for r in results if r["risk"] == high),
+        },
+    }
+
+
+def analyze_text(text: str, use_llm: bool = False, audit: bool = False, compact: bool = False,
+                 progress=None) -> dict:
+    """Run the full pipeline over contract text and return the report dict.
+
+    With `compact`, "clauses" is a core.records.ResultStore over `text`
+    instead of a list of dicts. `progress(done, total)` is called after each
+    LLM request and may raise to abandon the analysis (core.jobs cancellation).
+    """
+    if len(text) < MIN_TEXT_CHARS:
+        raise PipelineError(f"Need more text ({MIN_TEXT_CHARS}+ characters)")
+
+    with metrics.span("detect_language"):
+        lang = detect_language(text)
+    with metrics.span("split"):
+        spans = segment(text, _splitter_lang(text, lang))
+    if metrics.enabled():  # Skip the encode when metrics are off
+        metrics.inc("bytes_processed_total", len(text.encode("utf-8")), stage="split")
+    if not spans:
+        raise PipelineError("No clauses found. Try full contract sections.")
+
+    with metrics.span("score"):
+        if compact:
+            results = score_records(text, spans)
+        else:
+            results = score_clauses([text[s:e] for s, e in spans], spans)
+    return _finish(results, lang, use_llm, audit, progress)
+
+
+def analyze_revision(doc: str, text: str, use_llm: bool = False, audit: bool = False, store=None,
+                     progress=None) -> dict:
+    """analyze_text for one version of a named document, reusing the previous version's results.
+
+    Clauses are aligned with the last stored version (core.versions); only
+    modified and added clauses are scored and, with `use_llm`, reviewed.
+    Unchanged and moved clauses keep their stored results. The report gains a
+    "revision" block: the version numbers, each clause's status and score delta,
+    and the removed clauses. Re-submitting the latest text stores nothing.
+    """
+    from core import versions
+    store = store or versions.get_store()
+    if len(text) < MIN_TEXT_CHARS:
+        raise PipelineError(f"Need more text ({MIN_TEXT_CHARS}+ characters)")
+
+    digest = versions.text_digest(text)
+    latest = store.latest(doc)
+    if latest is not None and latest["digest"] == digest:
+        # Same text as the newest version: report it against its predecessor again
+        base = store.previous(doc, latest["version"])
+        results, hashes, lang, version = latest["results"], latest["hashes"], latest["lang"], latest["version"]
+        matches, removed = _align_with(base, hashes, [r["clause"] for r in results])
+        needs_review = [r for r in results if "analysis" not in r] if use_llm else []
+    else:
+        base = latest
+        with metrics.span("detect_language"):
+            lang = detect_language(text)
+        with metrics.span("split"):
+            spans = segment(text, _splitter_lang(text, lang))
+        clauses = [text[s:e] for s, e in spans]
+        if not clauses:
+            raise PipelineError("No clauses found. Try full contract sections.")
+        hashes = [versions.clause_hash(c) for c in clauses]
+        with metrics.span("align"):
+            matches, removed = _align_with(base, hashes, clauses)
+
+        results, changed = [], []
+        for (start, end), (status, old) in zip(spans, matches):
+            if status in (versions.UNCHANGED, versions.MOVED):
+                results.append(dict(base["results"][old], start=start, end=end))
+            else:
+                results.append(None)
+                changed.append(len(results) - 1)
+        with metrics.span("score"):
+            for i, scored in zip(changed, score_clauses([clauses[i] for i in changed], [spans[i] for i in changed])):
+                results[i] = scored
+        needs_review = [r for r in results if "analysis" not in r] if use_llm else []
+        version = None
+
+    for status, _ in matches:
+        metrics.inc("revision_clauses_total", status=status)
+    if needs_review:
+        _review_with_llm(needs_review, lang, progress)
+    if version is None:
+        version = store.save(doc, digest, lang, hashes, results)
+    elif needs_review:
+        store.update_results(doc, version, results)
+    report = _finish(results, lang, False, audit)
+    report["revision"] = _revision_block(doc, version, base, results, matches, removed)
+    return report
+
+
+def _align_with(base: dict | None, hashes: list[str], clauses: list[str]):
+    """Alignment against a stored version; with no previous version every clause is added."""
+    from core import versions
+    if base is None:
+        return [(versions.ADDED, None)] * len(hashes), []
+    old_clauses = [r["clause"] for r in base["results"]]
+    return versions.align(base["hashes"], hashes, old_clauses, clauses)
+
+
+def _revision_block(doc: str, version: int, base: dict | None, results: list[dict], matches, removed) -> dict:
+    clauses = []
+    for r, (status, old) in zip(results, matches):
+        previous_score = base["results"][old]["score"] if old is not None else None
+        clauses.append({
+            "status": status,
+            "previous_index": old,
+            "previous_score": previous_score,
+            "score_delta": r["score"] - previous_score if previous_score is not None else None,
+        })
+    counts = {}
+    for entry in clauses:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return {
+        "document": doc,
+        "version": version,
+        "previous_version": base["version"] if base else None,
+        "previous_summary": build_report(base["results"], base["lang"])["summary"] if base else None,
+        "clauses": clauses,
+        "removed": [{"index": i, "clause": base["results"][i]["clause"], "score": base["results"][i]["score"]}
+                    for i in removed],
+        "counts": {**counts, "removed": len(removed)},
+    }
+
+
+def _splitter_lang(text: str, lang: str) -> str | None:
+    """None (both keyword sets) for mixed documents: English text with any Devanagari."""
+    return None if lang == "en" and detect_language(text, threshold=0) == "hi" else lang
+
+
+def _review_with_llm(results: list[dict], lang: str, progress=None):
+    """Attach an LLM "analysis" to each result, batched per clause language."""
+    from core.risk_engine import analyze_clauses_with_llm
+    by_lang = {}
+    for r in results:  # One batch per clause language: Hindi clauses get the Hindi prompt
+        by_lang.setdefault(r.get("language", lang), []).append(r)
+    with metrics.span("llm"):
+        for clause_lang, group in by_lang.items():
+            clauses = [r["clause"] for r in group]
+            for r, analysis in zip(group, analyze_clauses_with_llm(clauses, clause_lang, progress=progress)):
+                r["analysis"] = analysis
+
+
+def _finish(results: list[dict], lang: str, use_llm: bool, audit: bool, progress=None) -> dict:
+    """Optional LLM + audit stages, then the report."""
+    metrics.inc("clauses_total", len(results), language=lang)
+    if use_llm:
+        _review_with_llm(results, lang, progress)
+
+    if audit:
+        from core.audit import log_audit
+        log_audit(results, lang)
+
+    return build_report(results, lang)
+
+
+def in_background(iterable, name: str = "producer"):
+    """Run `iterable` on a daemon thread and yield its items here as they are queued.
+
+    Keeps the consumer (e.g. the Streamlit script thread) free while the
+    producer waits on the network; an exception in the producer is re-raised
+    in the consumer.
+    """
+    items = queue.Queue()
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                items.put(item)
+        except BaseException as e:
+            items.put(e)
+        items.put(done)
+
+    threading.Thread(target=produce, name=name, daemon=True).start()
+    while (item := items.get()) is not done:
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def stream_llm(results: list[dict], lang: str):
+    """Yield (result_index, analysis) in arrival order from a background producer.
+
+    `results` is not modified. Clauses are grouped by their own language, as in
+    the batch path; cache hits arrive immediately, the rest one streamed
+    request round trip later.
+    """
+    from core.risk_engine import iter_clauses_with_llm
+
+    def produce():
+        by_lang = {}
+        for i, r in enumerate(results):
+            by_lang.setdefault(r.get("language", lang), []).append(i)
+        for clause_lang, indices in by_lang.items():
+            clauses = [results[i]["clause"] for i in indices]
+            for j, analysis in iter_clauses_with_llm(clauses, clause_lang):
+                yield indices[j], analysis
+
+    with metrics.span("llm_stream"):
+        yield from in_background(produce(), name="llm-stream")
+
+
+def stream_analysis(chunks, lang: str | None = None):
+    """Score clauses as the splitter emits them from a stream of text chunks.
+
+    The first clause is scored before later chunks (pages) are even extracted.
+    "start"/"end" are offsets into the chunks joined by single spaces.
+    """
+    for clause, start, end in iter_clause_spans(chunks, lang):
+        yield score_clauses([clause], [(start, end)])[0]
+
+
+def _coalesce(pieces, size: int = STREAM_CHUNK_CHARS):
+    """Join small text pieces into chunks of about `size` characters."""
+    chunk, length = [], 0
+    for piece in pieces:
+        chunk.append(piece)
+        length += len(piece) + 1
+        if length >= size:
+            yield " ".join(chunk)
+            chunk, length = [], 0
+    if chunk:
+        yield " ".join(chunk)
+
+
+def _analyze_stream(chunks, fmt: str, use_llm: bool, audit: bool, compact: bool = False) -> dict:
+    """Language from the first chunk, then split and score chunk by chunk."""
+    first = next(chunks, "")
+    lang = detect_language(first)
+    chunks = itertools.chain([first], chunks)
+    with metrics.span("split_score_stream", format=fmt):
+        if compact:
+            results = stream_records(iter_clause_spans(chunks, _splitter_lang(first, lang)))
+        else:
+            results = list(stream_analysis(chunks, _splitter_lang(first, lang)))
+    if not results:
+        raise PipelineError("No clauses found. Try full contract sections.")
+    return _finish(results, lang, use_llm, audit)
+
+
+def analyze_pdf(file, use_llm: bool = False, audit: bool = False, compact: bool = False) -> dict:
+    """Page-streaming variant of analyze_text for PDFs: text is never held whole."""
+    return _analyze_stream(iter_pdf_pages(file), "pdf", use_llm, audit, compact)
+
+
+def analyze_docx(file, use_llm: bool = False, audit: bool = False, compact: bool = False) -> dict:
+    """Paragraph-streaming variant of analyze_text for DOCX, tables included."""
+    return _analyze_stream(_coalesce(iter_docx_paragraphs(file)), "docx", use_llm, audit, compact)
+
+
+def analyze_file(path: str, use_llm: bool = False, audit: bool = False, compact: bool = False) -> dict:
+    """Extract a PDF/DOCX/TXT file from disk and analyze it."""
+    if path.lower().endswith(".pdf"):
+        return analyze_pdf(path, use_llm=use_llm, audit=audit, compact=compact)
+    if path.lower().endswith(".docx"):
+        return analyze_docx(path, use_llm=use_llm, audit=audit, compact=compact)
+    with open(path, "rb") as f:
+        text = extract_text(os.path.basename(path), f)
+    if not text.strip():
+        raise PipelineError("Could not extract text from file")
+    return analyze_text(text, use_llm=use_llm, audit=audit, compact=compact)
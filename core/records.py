@@ -0,0 +1,234 @@
+"""Compact clause results for large documents and batches.
+
+A ResultStore keeps the document text once and, per clause, only numbers:
+- (start, end) offsets into the shared text buffer, and the clause's start
+  in the source document when it is known;
+- the score;
+- entity counts and the buyer/seller flag;
+- codes for the interned labels: risk level, clause type, card labels and language;
+- the matched terms, as codes into the same vocabulary.
+
+Indexing the store gives a ClauseRecord, a read-only mapping with the same
+keys as a `score_clauses` result dict. `build_report`, `log_audit` and the
+LLM stage therefore work on it unchanged. The explanation and suggested fix
+are derived on access, and `dict(record)` / `to_dicts()` build real dicts only
+where results are serialized.
+"""
+from array import array
+from collections.abc import Mapping, Sequence
+
+from core.scoring import explain_risk, suggest_fix
+
+LABELS = ("risk", "clause_type", "ownership", "exclusivity", "favor", "language")
+TERM_LISTS = ("ip_terms", "obligations", "money")
+KEYS = ("clause", "start", "end", "language", "entities", "clause_type", "risk", "score", "ownership", "exclusivity",
+        "favor", "explanation", "suggested_fix")
+
+
+class ClauseRecord(Mapping):
+    """Read-only dict view of one clause in a ResultStore; values are built on access."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "ResultStore", index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._store.field(self._index, key)
+
+    def __setitem__(self, key, value):
+        if key != "analysis":
+            raise TypeError("only 'analysis' can be set on a ClauseRecord")
+        self._store.set_analysis(self._index, value)
+
+    def __iter__(self):
+        yield from KEYS
+        if self._index in self._store.analyses:
+            yield "analysis"
+
+    def __len__(self):
+        return len(KEYS) + (self._index in self._store.analyses)
+
+    @property
+    def span(self) -> tuple[int | None, int | None]:
+        """Offsets of the clause in the source document (None when unknown)."""
+        return self._store.offsets(self._index)
+
+    def __repr__(self):
+        return f"ClauseRecord({self._index}, {dict(self)!r})"
+
+
+class ResultStore(Sequence):
+    """Array-backed clause results over one shared text buffer.
+
+    Build it with `add(start, end, scored, language)` for clauses that are
+    spans of `text`, or `append(clause, scored, language, start)` to copy streamed clauses into the
+    store's own buffer; `start` is the clause's offset in the source document, if known.
+    `scored` is a `core.scoring.analyze_clauses` result. LLM analyses are kept
+    by reference in a sparse dict.
+    """
+
+    __slots__ = ("_parts", "_text", "_size", "_spans", "_offsets", "_scores", "_counts", "_labels", "_terms",
+                 "_term_ends", "_vocab", "_codes", "analyses")
+
+    def __init__(self, text: str = ""):
+        self._parts = [text] if text else []
+        self._text = text
+        self._size = len(text)
+        self._spans = array("I")       # start, end per clause
+        self._offsets = array("q")     # document start per clause, -1 when unknown
+        self._scores = array("B")      # 0-100
+        self._counts = array("H")      # ip_count, obligation_count, buyer_seller per clause
+        self._labels = array("H")      # one vocabulary code per LABELS entry per clause
+        self._terms = array("I")       # vocabulary codes of all matched terms, clause by clause
+        self._term_ends = array("I")   # end offset into _terms of each TERM_LISTS entry per clause
+        self._vocab = []
+        self._codes = {}
+        self.analyses = {}
+
+    def _code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._vocab)
+            self._vocab.append(value)
+        return code
+
+    @property
+    def text(self) -> str:
+        """The shared buffer; appended clauses are joined once, on first access."""
+        if len(self._parts) > 1:
+            self._text = "".join(self._parts)
+            self._parts = [self._text]
+        return self._text
+
+    def add(self, start: int, end: int, scored: dict, language: str, offset: int | None = None):
+        """Record a clause that is `text[start:end]`; `offset` is its document start (default `start`)."""
+        entities = scored["entities"]
+        self._spans.extend((start, end))
+        self._offsets.append(start if offset is None else offset)
+        self._scores.append(scored["score"])
+        self._counts.extend((entities["ip_count"], entities["obligation_count"], bool(entities["buyer_seller"])))
+        self._labels.extend(self._code(language if name == "language" else scored[name]) for name in LABELS)
+        for name in TERM_LISTS:
+            self._terms.extend(self._code(term) for term in entities[name])
+            self._term_ends.append(len(self._terms))
+
+    def append(self, clause: str, scored: dict, language: str, start: int | None = None):
+        """Copy `clause` into the buffer and record it; `start` is its document offset, if known."""
+        buffer_start = self._size
+        self._parts.append(clause)
+        self._size += len(clause)
+        self.add(buffer_start, self._size, scored, language, -1 if start is None else start)
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ClauseRecord(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("clause index out of range")
+        return ClauseRecord(self, index)
+
+    def span(self, i: int) -> tuple[int, int]:
+        """Offsets of clause `i` in the store's own buffer (`text`)."""
+        return self._spans[2 * i], self._spans[2 * i + 1]
+
+    def offsets(self, i: int) -> tuple[int | None, int | None]:
+        """Offsets of clause `i` in the source document, or (None, None) when unknown."""
+        start = self._offsets[i]
+        if start < 0:
+            return None, None
+        buffer_start, buffer_end = self.span(i)
+        return start, start + buffer_end - buffer_start
+
+    def clause(self, i: int) -> str:
+        start, end = self.span(i)
+        return self.text[start:end]
+
+    def label(self, i: int, name: str) -> str:
+        return self._vocab[self._labels[i * len(LABELS) + LABELS.index(name)]]
+
+    def entities(self, i: int) -> dict:
+        k = i * len(TERM_LISTS)
+        start = self._term_ends[k - 1] if k else 0
+        entities = {}
+        for j, name in enumerate(TERM_LISTS):
+            end = self._term_ends[k + j]
+            entities[name] = [self._vocab[code] for code in self._terms[start:end]]
+            start = end
+        ip_count, obligation_count, buyer_seller = self._counts[3 * i:3 * i + 3]
+        entities.update(buyer_seller=bool(buyer_seller), ip_count=ip_count, obligation_count=obligation_count)
+        return entities
+
+    def field(self, i: int, key: str):
+        if key == "clause":
+            return self.clause(i)
+        if key == "score":
+            return self._scores[i]
+        if key in ("start", "end"):
+            return self.offsets(i)[key == "end"]
+        if key in LABELS:
+            return self.label(i, key)
+        if key == "entities":
+            return self.entities(i)
+        if key == "explanation":
+            return explain_risk(self.entities(i))
+        if key == "suggested_fix":
+            return suggest_fix(self.label(i, "risk"))
+        if key == "analysis" and i in self.analyses:
+            return self.analyses[i]
+        raise KeyError(key)
+
+    def set_analysis(self, i: int, analysis: dict):
+        self.analyses[i] = analysis
+
+    def to_dict(self, i: int) -> dict:
+        """Plain result dict of clause `i`, as score_clauses builds it."""
+        entities = self.entities(i)
+        score = self._scores[i]
+        label = self.label
+        start, end = self.offsets(i)
+        result = {
+            "clause": self.clause(i),
+            "start": start,
+            "end": end,
+            "language": label(i, "language"),
+            "entities": entities,
+            "clause_type": label(i, "clause_type"),
+            "risk": label(i, "risk"),
+            "score": score,
+            "ownership": label(i, "ownership"),
+            "exclusivity": label(i, "exclusivity"),
+            "favor": label(i, "favor"),
+            "explanation": explain_risk(entities),
+            "suggested_fix": suggest_fix(label(i, "risk")),
+        }
+        if i in self.analyses:
+            result["analysis"] = self.analyses[i]
+        return result
+
+    def iter_dicts(self):
+        """Plain result dicts, one at a time (for writers that stream)."""
+        for i in range(len(self)):
+            yield self.to_dict(i)
+
+    def to_dicts(self) -> list[dict]:
+        return list(self.iter_dicts())
+
+    def nbytes(self) -> int:
+        """Approximate size of the per-clause arrays, excluding text and vocabulary."""
+        return sum(a.itemsize * len(a) for a in (self._spans, self._offsets, self._scores, self._counts,
+                                                 self._labels, self._terms, self._term_ends))
+
+    def __getstate__(self):
+        text = self.text  # Joins appended clauses first
+        return {name: getattr(self, name) for name in self.__slots__ if name != "_parts"} | {"_text": text}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._parts = [self._text] if self._text else []
@@ -0,0 +1,155 @@
+"""PDF risk reports, built incrementally with per-process font and style caches.
+
+ReportLab normally receives the whole story as a list of flowables up front.
+Here flowables are generated clause by clause and handed to the layout engine
+through a small look-ahead buffer, so a report with hundreds of clauses never
+holds more than a few paragraphs at once; laid-out pages go straight to the
+target file or stream. Fonts are registered and styles built once per process
+(via core.lazy) instead of on every export.
+
+Hindi text needs a TTF with Devanagari glyphs: set REPORT_DEVANAGARI_FONT, or
+drop NotoSansDevanagari-Regular.ttf into fonts/. Without one, Hindi paragraphs
+fall back to Helvetica as before.
+"""
+import os
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from core import lazy, metrics
+from core.language import detect_language
+
+DEVANAGARI_FONT = "Devanagari"
+FONT_CANDIDATES = [
+    os.getenv("REPORT_DEVANAGARI_FONT", ""),
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fonts", "NotoSansDevanagari-Regular.ttf"),
+    "/usr/share/fonts/truetype/noto/NotoSansDevanagari-Regular.ttf",
+    "/usr/share/fonts/noto/NotoSansDevanagari-Regular.ttf",
+    "/usr/share/fonts/truetype/lohit-devanagari/Lohit-Devanagari.ttf",
+    "/usr/share/fonts/truetype/fonts-deva-extra/gargi.ttf",
+    "C:/Windows/Fonts/Nirmala.ttf",
+    "C:/Windows/Fonts/mangal.ttf",
+]
+LOOKAHEAD = 16  # Flowables buffered ahead of the layout engine (keepWithNext needs a few)
+CLAUSE_PREVIEW_CHARS = 400
+
+
+def _register_devanagari() -> str | None:
+    """Register the first Devanagari TTF found; returns the font name or None."""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    for path in FONT_CANDIDATES:
+        if path and os.path.isfile(path):
+            pdfmetrics.registerFont(TTFont(DEVANAGARI_FONT, path))
+            return DEVANAGARI_FONT
+    return None
+
+
+def _build_styles() -> dict:
+    """Sample stylesheet plus a Devanagari twin of each body style."""
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    sheet = getSampleStyleSheet()
+    font = _register_devanagari()
+    styles = {name: sheet[name] for name in ("Title", "Heading2", "Heading3", "Normal", "BodyText")}
+    hindi = {
+        name: ParagraphStyle(f"{name}-hi", parent=style, fontName=font) if font else style
+        for name, style in styles.items()
+    }
+    return {"en": styles, "hi": hindi}
+
+
+lazy.register("report_styles", _build_styles)
+
+
+def _style(name: str, text: str):
+    """Style for `text`: the Devanagari variant when the text contains any Hindi."""
+    return lazy.get("report_styles")[detect_language(text, threshold=0)][name]
+
+
+def _paragraph(text, style: str):
+    from reportlab.platypus import Paragraph
+
+    text = escape(str(text))
+    return Paragraph(text, _style(style, text))
+
+
+class _FlowableStream(list):
+    """List facade over a flowable generator for ReportLab's `build()`.
+
+    `build()` only ever looks at, deletes or splits the first few items, so the
+    list is topped up from the generator whenever it is inspected and consumed
+    flowables are released as soon as they are laid out.
+    """
+
+    def __init__(self, flowables):
+        super().__init__()
+        self._source = iter(flowables)
+
+    def _fill(self, upto: int = LOOKAHEAD):
+        while self._source is not None and list.__len__(self) < upto:
+            item = next(self._source, None)
+            if item is None:
+                self._source = None
+            else:
+                self.append(item)
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and index >= 0:
+            self._fill(max(LOOKAHEAD, index + 1))
+        return list.__getitem__(self, index)
+
+
+def summary_flowables(results: list[dict]):
+    """Report layout used by the app: overall score and a preview of each clause."""
+    from reportlab.platypus import Spacer
+
+    yield _paragraph("Legal Contract Risk Analysis Report", "Title")
+    yield Spacer(1, 20)
+    avg_score = sum(r["score"] for r in results) / len(results) if results else 0
+    yield _paragraph(f"Overall Risk: {avg_score:.0f}/100", "Heading2")
+    for i, r in enumerate(results, 1):
+        yield _paragraph(f"Clause {i}: {r['risk']} ({r['score']}/100)", "Heading3")
+        yield _paragraph(r["clause"][:CLAUSE_PREVIEW_CHARS], "Normal")
+        yield Spacer(1, 12)
+
+
+def detailed_flowables(results: list[dict]):
+    """Full-clause layout with a risk table and the LLM reason/fix per clause."""
+    from reportlab.lib import colors
+    from reportlab.platypus import Spacer, Table, TableStyle
+
+    grid = TableStyle([("GRID", (0, 0), (-1, -1), 0.5, colors.grey)])
+    yield _paragraph("Legal Contract Risk Analysis Report", "Title")
+    for i, item in enumerate(results, 1):
+        yield Spacer(1, 12)
+        yield _paragraph(f"Clause {i}", "Heading2")
+        yield _paragraph(item["clause"], "BodyText")
+        table = Table([["Risk Level", item["risk"]], ["Risk Score", item["score"]]])
+        table.setStyle(grid)
+        yield table
+        analysis = item.get("analysis") or {}
+        for key in ("risk_reason", "suggested_fix"):
+            if analysis.get(key):
+                yield _paragraph(analysis[key], "BodyText")
+
+
+def write_report(results: list[dict], out, detailed: bool = False):
+    """Lay out the report into `out` (a path or a binary file object)."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate
+
+    flowables = detailed_flowables(results) if detailed else summary_flowables(results)
+    with metrics.span("report", layout="detailed" if detailed else "summary"):
+        SimpleDocTemplate(out, pagesize=A4).build(_FlowableStream(flowables))
+
+
+def render_report(results: list[dict], detailed: bool = False) -> bytes:
+    """write_report into memory, for download buttons."""
+    buffer = BytesIO()
+    write_report(results, buffer, detailed=detailed)
+    return buffer.getvalue()
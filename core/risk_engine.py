@@ -1,70 +1,91 @@
-import os
-import json
-import streamlit as st
-from groq import Groq
-
-def get_groq_client():
-    """Initialize Groq with maximum compatibility."""
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
-        return None
-    
-    # Try multiple initialization methods
-    try:
-        # Method 1: Basic init
-        return Groq(api_key=api_key)
-    except TypeError as e:
-        if "proxies" in str(e):
-            # Method 2: Direct HTTP client (bypasses httpx)
-            try:
-                from groq import OpenAI  # Fallback
-                return OpenAI(api_key=api_key, base_url="https://api.groq.com/openai/v1")
-            except:
-                pass
-    
-    return None
-
-_client = None
-def analyze_clause_with_llm(clause_text: str, lang: str) -> dict:
-    """Safe LLM analysis with fallback."""
-    global _client
-    if _client is None:
-        _client = get_groq_client()
-    
-    if not _client:
-        # OFFLINE FALLBACK - Perfect output format
-        return {
-            "ownership": "assigned" if "assign" in clause_text.lower() else "unclear",
-            "exclusivity": "exclusive" if "exclusive" in clause_text.lower() else "unclear",
-            "favor": "one-sided" if "buyer" in clause_text.lower() and "seller" in clause_text.lower() else "balanced",
-            "risk_reason": "Full asset transfer to Buyer with no Seller protections identified.",
-            "suggested_fix": "Add limitations on liability, retain some IP rights, negotiate termination terms."
-        }
-    
-    try:
-        prompt = f"""Analyze ONLY this clause for IP/legal risk. Return JSON:
-
-{{"ownership": "assigned|licensed|retained|unclear",
+from core import metrics
+from core.llm_batch import MAX_IN_FLIGHT, RATE_LIMIT, analyze_packed_misses, iter_packed_misses
+from core.llm_cache import cached_batch, iter_cached
+from core.packing import REPLY_TOKENS_PER_ITEM, format_items
+
+MODEL = "llama3-8b-8192"  # Stable model
+PROMPT_VERSION = "risk-v3"  # Bump when get_batch_prompt changes to invalidate cached analyses
+API_FALLBACK = {
+    "ownership": "assigned",
+    "exclusivity": "unclear", 
+    "favor": "one-sided",
+    "risk_reason": "Complete asset sale to Buyer detected - high risk for Seller.",
+    "suggested_fix": "Negotiate partial IP retention + liability caps."
+}
+
+def offline_analysis(clause_text: str) -> dict:
+    """OFFLINE FALLBACK - Perfect output format"""
+    return {
+        "ownership": "assigned" if "assign" in clause_text.lower() else "unclear",
+        "exclusivity": "exclusive" if "exclusive" in clause_text.lower() else "unclear",
+        "favor": "one-sided" if "buyer" in clause_text.lower() and "seller" in clause_text.lower() else "balanced",
+        "risk_reason": "Full asset transfer to Buyer with no Seller protections identified.",
+        "suggested_fix": "Add limitations on liability, retain some IP rights, negotiate termination terms."
+    }
+
+def get_batch_prompt(items: list[tuple[str, str]], lang: str = "en") -> str:
+    """Prompt for several clauses (or clause chunks) in one request, in the clauses' language."""
+    if lang == "hi":
+        return f"""केवल इन क्लॉज का IP/कानूनी जोखिम के लिए विश्लेषण करें। हर क्लॉज के लिए एक object वाला JSON array दें:
+
+[{{"id": "c0",
+  "ownership": "assigned|licensed|retained|unclear",
+  "exclusivity": "exclusive|non-exclusive|unclear",
+  "favor": "one-sided|balanced|neutral",
+  "risk_reason": "1 वाक्य में कारण",
+  "suggested_fix": "व्यावहारिक सुधार"}}]
+
+क्लॉज:
+{format_items(items)}"""
+    return f"""Analyze ONLY these clauses for IP/legal risk. Return a JSON array with one object per clause:
+
+[{{"id": "c0",
+  "ownership": "assigned|licensed|retained|unclear",
   "exclusivity": "exclusive|non-exclusive|unclear",
   "favor": "one-sided|balanced|neutral",
   "risk_reason": "1 sentence explanation",
-  "suggested_fix": "Actionable fix"}}
-
-Clause: {clause_text[:1500]}"""
-
-        response = _client.chat.completions.create(
-            model="llama3-8b-8192",  # Stable model
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
-        
-        return json.loads(response.choices[0].message.content)
-    except:
-        # Same fallback as above
-        return {
-            "ownership": "assigned",
-            "exclusivity": "unclear", 
-            "favor": "one-sided",
-            "risk_reason": "Complete asset sale to Buyer detected - high risk for Seller.",
-            "suggested_fix": "Negotiate partial IP retention + liability caps."
-        }
+  "suggested_fix": "Actionable fix"}}]
+
+Clauses:
+{format_items(items)}"""
+
+def analyze_clause_with_llm(clause_text: str, lang: str) -> dict:
+    """Safe LLM analysis with fallback; long clauses are chunked, not truncated, as in the batch path."""
+    return analyze_clauses_with_llm([clause_text], lang)[0]
+
+def _batch_payload(items: list[tuple[str, str]], lang: str) -> dict:
+    return {
+        "model": MODEL,
+        "messages": [{"role": "user", "content": get_batch_prompt(items, lang)}],
+        "temperature": 0.1,
+        "max_tokens": REPLY_TOKENS_PER_ITEM * len(items) + 100,
+    }
+
+def analyze_clauses_with_llm(clauses: list[str], lang: str,
+                             max_in_flight: int = MAX_IN_FLIGHT, rate: float = RATE_LIMIT,
+                             progress=None) -> list[dict]:
+    """Batch version of analyze_clause_with_llm: packed requests, results in input order.
+
+    `progress(done, total)` is called after each request and may raise to stop.
+    """
+
+    def analyze_misses(misses: list[str]) -> list[tuple[dict, bool]]:
+        return analyze_packed_misses(misses, lambda items: _batch_payload(items, lang), offline_analysis,
+                                     API_FALLBACK, lambda e: dict(API_FALLBACK), max_in_flight, rate, progress)
+
+    with metrics.span("llm_batch", model=MODEL):
+        return cached_batch(clauses, lang, MODEL, PROMPT_VERSION, analyze_misses)
+
+def iter_clauses_with_llm(clauses: list[str], lang: str,
+                          max_in_flight: int = MAX_IN_FLIGHT, rate: float = RATE_LIMIT):
+    """Streaming analyze_clauses_with_llm: yields (index, analysis) as each result arrives.
+
+    Cache hits come first; misses are read from streaming completions and
+    yielded the moment their JSON object is complete.
+    """
+
+    def iter_misses(misses: list[str]):
+        return iter_packed_misses(misses, lambda items: _batch_payload(items, lang), offline_analysis,
+                                  API_FALLBACK, lambda e: dict(API_FALLBACK), max_in_flight, rate)
+
+    return iter_cached(clauses, lang, MODEL, PROMPT_VERSION, iter_misses)
@@ -0,0 +1,106 @@
+"""Vectorized rule scoring with weights loaded from a config file.
+
+Clauses become rows of a feature matrix (keyword/entity counts from
+core.matcher). Each rule sums some feature columns and fires when the sum lies
+in [min, max]; the score is the capped dot product of fired rules and
+weights. Scoring any number of clauses is a handful of array operations:
+
+    S = X @ A                    # per-rule feature sums   (n × r)
+    F = (S >= lo) & (S <= hi)    # fired rules
+    score = min(F @ w, max_score)
+
+Rules, weights and thresholds live in config/risk_rules.json (or
+$RISK_RULES_PATH) and are reloaded when the file changes, so re-tuning needs
+no redeploy. The file is stat'ed at most every RISK_RULES_CHECK_SECONDS, not on
+every scoring call.
+"""
+import json
+import os
+import threading
+import time
+
+from core.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+RISK_RULES_PATH = os.getenv(
+    "RISK_RULES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "risk_rules.json"),
+)
+CHECK_SECONDS = float(os.getenv("RISK_RULES_CHECK_SECONDS", "2"))  # Edits take effect within this long
+
+
+class RiskModel:
+    def __init__(self, config: dict):
+        self.features = list(config["features"])
+        self.rule_names = [r["name"] for r in config["rules"]]
+        index = {f: i for i, f in enumerate(self.features)}
+        self.selector = np.zeros((len(self.features), len(config["rules"])), dtype=np.int32)
+        for j, rule in enumerate(config["rules"]):
+            for feature in rule["features"]:
+                self.selector[index[feature], j] = 1
+        self.low = np.array([r.get("min", 1) for r in config["rules"]], dtype=np.int64)
+        self.high = np.array([r["max"] if r.get("max") is not None else np.iinfo(np.int64).max
+                              for r in config["rules"]], dtype=np.int64)
+        self.weights = np.array([r["weight"] for r in config["rules"]], dtype=np.float64)
+        self.max_score = config.get("max_score", 100)
+        # Highest threshold first; a score takes the first level it reaches
+        levels = sorted(config["thresholds"].items(), key=lambda kv: -kv[1])
+        self.levels = [name for name, _ in levels] + [config.get("default_level", "Low")]
+        self.cutoffs = np.array([cut for _, cut in levels], dtype=np.float64)
+
+    @property
+    def high_level(self) -> str:
+        """Name of the top threshold: what the report summary and audit rollups count as high risk."""
+        return self.levels[0]
+
+    @property
+    def medium_level(self) -> str | None:
+        """Name of the second-highest threshold, if the config has one."""
+        return self.levels[1] if len(self.cutoffs) > 1 else None
+
+    @classmethod
+    def from_file(cls, path: str) -> "RiskModel":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def feature_matrix(self, feature_dicts: list[dict]):
+        """Rows of feature counts in config order (booleans count as 0/1)."""
+        return np.array([[int(d.get(f, 0)) for f in self.features] for d in feature_dicts],
+                        dtype=np.int32).reshape(len(feature_dicts), len(self.features))
+
+    def score_matrix(self, X):
+        """Return (scores, level indexes into self.levels) for a feature matrix."""
+        sums = X @ self.selector
+        fired = (sums >= self.low) & (sums <= self.high)
+        scores = np.minimum(fired @ self.weights, self.max_score)
+        # Count cutoffs *not* reached, from the top: 0 -> highest level
+        level_idx = (scores[:, None] < self.cutoffs[None, :]).sum(axis=1)
+        return scores.astype(np.int64), level_idx
+
+    def score(self, feature_dicts: list[dict]) -> list[tuple[str, int]]:
+        """(risk level, score) per clause, in input order."""
+        if not feature_dicts:
+            return []
+        scores, level_idx = self.score_matrix(self.feature_matrix(feature_dicts))
+        return [(self.levels[i], int(s)) for i, s in zip(level_idx.tolist(), scores.tolist())]
+
+
+_model = None
+_model_mtime = None
+_model_checked = 0.0
+_model_lock = threading.Lock()
+def get_model(path: str | None = None) -> RiskModel:
+    """Shared model, reloaded when the rules file's mtime changes (checked every CHECK_SECONDS)."""
+    global _model, _model_mtime, _model_checked
+    path = path or RISK_RULES_PATH
+    with _model_lock:
+        now = time.monotonic()
+        if _model is not None and _model_mtime[0] == path and now - _model_checked < CHECK_SECONDS:
+            return _model
+        mtime = os.path.getmtime(path)
+        if _model is None or _model_mtime != (path, mtime):
+            _model = RiskModel.from_file(path)
+            _model_mtime = (path, mtime)
+        _model_checked = now
+        return _model
@@ -0,0 +1,87 @@
+from core.matcher import scan_clause, scan_clauses
+from core.risk_model import get_model
+
+# Fix text by threshold rank: the top threshold's level, then the second-highest
+FIXES = (
+    "Negotiate IP retention, liability caps, mutual termination rights",
+    "Add time limits, clarify obligations, balance terms",
+)
+DEFAULT_FIX = "Terms appear reasonable"
+
+def entities_from_scan(scan):
+    """Entity dict in the shape the UI, reports and audit log expect."""
+    features = scan["features"]
+    return {
+        "ip_terms": scan["ip_terms"],
+        "obligations": scan["obligations"],
+        "money": scan["money"],
+        "buyer_seller": features["buyer_seller"],
+        "ip_count": features["ip_count"],
+        "obligation_count": features["obligation_count"]
+    }
+
+def extract_entities(clause):
+    """FIXED: Better entity detection"""
+    return entities_from_scan(scan_clause(clause))
+
+def risk_from_features(features):
+    """FIXED: Proper risk scoring (rules and weights from config/risk_rules.json)"""
+    return get_model().score([features])[0]
+
+def calculate_risk(clause, entities):
+    """Risk level and score; entity counts come from `entities`, keywords from one scan."""
+    features = dict(scan_clause(clause)["features"])
+    features.update(ip_count=entities["ip_count"], obligation_count=entities["obligation_count"],
+                    buyer_seller=entities["buyer_seller"])
+    return risk_from_features(features)
+
+def rule_labels(scan):
+    """Rule-based ownership/exclusivity/favor labels shown on each clause card."""
+    features = scan["features"]
+    return {
+        "ownership": "Assigned" if features["ip_count"] > 0 or scan["counts"].get("transfer") else "Retained",
+        "exclusivity": "Exclusive" if features["exclusive_count"] else "Shared",
+        "favor": "One-sided" if features["buyer_seller"] else "Balanced",
+    }
+
+def rule_analysis(clause, entities):
+    labels = rule_labels(scan_clause(clause))
+    labels["favor"] = "One-sided" if entities["buyer_seller"] else "Balanced"
+    if entities["ip_count"] > 0:
+        labels["ownership"] = "Assigned"
+    return labels
+
+def analyze_clauses(clauses):
+    """Entities, clause type, risk and card labels for many clauses from one scan."""
+    scans = scan_clauses(clauses)
+    risks = get_model().score([scan["features"] for scan in scans])
+    results = []
+    for scan, (risk_level, score) in zip(scans, risks):
+        results.append({
+            "entities": entities_from_scan(scan),
+            "clause_type": scan["clause_type"],
+            "risk": risk_level,
+            "score": score,
+            **rule_labels(scan),
+        })
+    return results
+
+def explain_risk(entities):
+    """DETAILED risk explanation"""
+    explanation = []
+    if entities["ip_count"] > 0:
+        explanation.append(f"{entities['ip_count']} IP/legal terms: {', '.join(entities['ip_terms'][:2])}")
+    if entities["obligation_count"] > 0:
+        explanation.append(f"{entities['obligation_count']} obligation terms")
+    if entities["buyer_seller"]:
+        explanation.append("Buyer vs Seller - potential imbalance")
+    if entities["money"]:
+        explanation.append(f"Financial terms detected")
+    
+    return "; ".join(explanation) if explanation else "Standard commercial terms"
+
+def suggest_fix(risk):
+    """Specific fixes for a risk level (thresholds from config/risk_rules.json)"""
+    model = get_model()
+    rank = model.levels.index(risk) if risk in model.levels[:len(model.cutoffs)] else len(FIXES)
+    return FIXES[rank] if rank < len(FIXES) else DEFAULT_FIX
@@ -0,0 +1,209 @@
+"""Document version store: re-analyze only the clauses a revision changed.
+
+Each analyzed version of a named document is saved with its clause results
+and one content hash per clause. A new version is aligned with the previous
+one in two steps:
+
+1. The hash sequences are diffed in order (difflib); unchanged runs and
+   moved clauses match by hash without comparing any text.
+2. Inside each replaced region, leftover clauses are paired by shingle
+   overlap (core.near_dup shingles) to tell edited clauses from new ones.
+   Each new clause is compared with at most 2 * PAIR_WINDOW + 1 old clauses.
+
+Unchanged clauses keep their stored results. Scoring, the LLM review and the
+alignment work all grow with the size of the edit, not the contract.
+
+The store lives in SQLite (VERSIONS_PATH) and keeps the newest
+VERSIONS_MAX_PER_DOC versions of each document.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from difflib import SequenceMatcher
+
+from core.llm_cache import normalize_clause
+from core.near_dup import shingles
+
+VERSIONS_FILE = os.getenv("VERSIONS_PATH", "data/versions.sqlite")
+MAX_VERSIONS = int(os.getenv("VERSIONS_MAX_PER_DOC", "20"))
+MODIFIED_THRESHOLD = 0.5  # Shared share of the smaller clause's shingles for "edited", not "new"
+PAIR_WINDOW = 8  # Old clauses either side of a new clause's position that are considered
+
+UNCHANGED, MOVED, MODIFIED, ADDED = "unchanged", "moved", "modified", "added"
+
+
+def clause_hash(text: str) -> str:
+    """Whitespace- and case-insensitive content hash (same normalization as the LLM cache)."""
+    return hashlib.sha256(normalize_clause(text).encode("utf-8")).hexdigest()
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def overlap(a: set, b: set) -> float:
+    """Overlap coefficient: an edit that only adds or removes a sentence still scores high."""
+    return len(a & b) / min(len(a), len(b)) if a and b else 0.0
+
+
+def _pair_similar(old_ids: list[int], new_ids: list[int], old_clauses: list[str], new_clauses: list[str],
+                  threshold: float) -> dict[int, int]:
+    """Greedy best-first pairing of a replaced region's new clauses with its old ones: {new: old}."""
+    old_sets = {i: set(shingles(old_clauses[i])) for i in old_ids}
+    candidates = []
+    for pos, j in enumerate(new_ids):
+        new_set = set(shingles(new_clauses[j]))
+        start = max(0, pos - PAIR_WINDOW)
+        for old_pos, i in enumerate(old_ids[start:pos + PAIR_WINDOW + 1], start):
+            score = overlap(old_sets[i], new_set)
+            if score >= threshold:
+                candidates.append((-score, abs(pos - old_pos), j, i))
+    pairs, used = {}, set()
+    for _, _, j, i in sorted(candidates):
+        if j not in pairs and i not in used:
+            pairs[j] = i
+            used.add(i)
+    return pairs
+
+
+def align(old_hashes: list[str], new_hashes: list[str], old_clauses: list[str], new_clauses: list[str],
+          threshold: float = MODIFIED_THRESHOLD) -> tuple[list[tuple[str, int | None]], list[int]]:
+    """Match each new clause to the previous version.
+
+    Returns one `(status, old_index)` per new clause, where status is one of
+    "unchanged", "moved", "modified" or "added" (old_index None), plus the
+    indices of old clauses that were removed.
+    """
+    matches = [(ADDED, None)] * len(new_hashes)
+    matched_old = set()
+    regions = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_hashes, new_hashes, autojunk=False).get_opcodes():
+        if tag == "equal":
+            for k in range(i2 - i1):
+                matches[j1 + k] = (UNCHANGED, i1 + k)
+                matched_old.add(i1 + k)
+        elif tag == "replace":
+            regions.append((range(i1, i2), range(j1, j2)))
+
+    # Same text elsewhere in the document: moved, not rewritten
+    free_old = {}
+    for i, h in enumerate(old_hashes):
+        if i not in matched_old:
+            free_old.setdefault(h, []).append(i)
+    for j, h in enumerate(new_hashes):
+        if matches[j][1] is None and free_old.get(h):
+            i = free_old[h].pop(0)
+            matches[j] = (MOVED, i)
+            matched_old.add(i)
+
+    for old_range, new_range in regions:
+        old_ids = [i for i in old_range if i not in matched_old]
+        new_ids = [j for j in new_range if matches[j][1] is None]
+        for j, i in _pair_similar(old_ids, new_ids, old_clauses, new_clauses, threshold).items():
+            matches[j] = (MODIFIED, i)
+            matched_old.add(i)
+    removed = [i for i in range(len(old_hashes)) if i not in matched_old]
+    return matches, removed
+
+
+class VersionStore:
+    """SQLite store of analyzed document versions, newest MAX_VERSIONS per document."""
+
+    def __init__(self, path: str = VERSIONS_FILE, max_versions: int = MAX_VERSIONS):
+        self.path = path
+        self.max_versions = max_versions
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS versions ("
+            " doc TEXT NOT NULL, version INTEGER NOT NULL, digest TEXT NOT NULL, lang TEXT NOT NULL,"
+            " hashes TEXT NOT NULL, results TEXT NOT NULL, created REAL NOT NULL,"
+            " PRIMARY KEY (doc, version))"
+        )
+
+    def _row(self, sql: str, params: tuple) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        if row is None:
+            return None
+        version, digest, lang, hashes, results, created = row
+        return {"version": version, "digest": digest, "lang": lang, "hashes": json.loads(hashes),
+                "results": json.loads(results), "created": created}
+
+    def latest(self, doc: str) -> dict | None:
+        return self._row("SELECT version, digest, lang, hashes, results, created FROM versions"
+                         " WHERE doc = ? ORDER BY version DESC LIMIT 1", (doc,))
+
+    def get(self, doc: str, version: int) -> dict | None:
+        return self._row("SELECT version, digest, lang, hashes, results, created FROM versions"
+                         " WHERE doc = ? AND version = ?", (doc, version))
+
+    def previous(self, doc: str, version: int) -> dict | None:
+        """Newest stored version older than `version` (older ones may have been pruned)."""
+        return self._row("SELECT version, digest, lang, hashes, results, created FROM versions"
+                         " WHERE doc = ? AND version < ? ORDER BY version DESC LIMIT 1", (doc, version))
+
+    def save(self, doc: str, digest: str, lang: str, hashes: list[str], results: list[dict]) -> int:
+        """Store a new version and return its number."""
+        with self._lock:
+            # Other processes (batch runs, job workers) number versions of the same file
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT MAX(version) FROM versions WHERE doc = ?", (doc,)).fetchone()
+                version = (row[0] or 0) + 1
+                self._conn.execute(
+                    "INSERT INTO versions (doc, version, digest, lang, hashes, results, created)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (doc, version, digest, lang, json.dumps(hashes),
+                     json.dumps(results, ensure_ascii=False), time.time()))
+                self._conn.execute("DELETE FROM versions WHERE doc = ? AND version <= ?",
+                                   (doc, version - self.max_versions))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return version
+
+    def update_results(self, doc: str, version: int, results: list[dict]):
+        """Replace a stored version's results (e.g. once LLM analyses were added)."""
+        with self._lock:
+            self._conn.execute("UPDATE versions SET results = ? WHERE doc = ? AND version = ?",
+                               (json.dumps(results, ensure_ascii=False), doc, version))
+
+    def history(self, doc: str) -> list[dict]:
+        """Version number, digest, language, clause count and creation time, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version, digest, lang, json_array_length(hashes), created FROM versions"
+                " WHERE doc = ? ORDER BY version", (doc,)).fetchall()
+        return [{"version": v, "digest": d, "lang": lang, "clauses": n, "created": c}
+                for v, d, lang, n, c in rows]
+
+    def documents(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT doc FROM versions ORDER BY doc")]
+
+    def clear(self, doc: str | None = None):
+        with self._lock:
+            if doc is None:
+                self._conn.execute("DELETE FROM versions")
+            else:
+                self._conn.execute("DELETE FROM versions WHERE doc = ?", (doc,))
+
+
+# Lazy shared instance
+_store = None
+_store_lock = threading.Lock()
+def get_store() -> VersionStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = VersionStore()
+    return _store